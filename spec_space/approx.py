@@ -0,0 +1,187 @@
+'''
+This module contains an approximate model counter with (epsilon, delta)
+guarantees, for CNFs that are too hard to count exactly.
+
+The counter follows ApproxMC (Chakraborty, Meel and Vardi): random XOR
+constraints over the counted variables split the models into cells of
+roughly equal size; a SAT solver enumerates the models of one cell up to a
+small threshold, and the count is estimated as the size of the cell times
+the number of cells. The median of several such estimates lies within a
+factor 1 + epsilon of the true count with probability at least 1 - delta.
+picosat, which comes with pyeda, serves as the SAT solver.
+'''
+
+import math
+import random
+import time
+
+from pyeda.boolalg import picosat
+
+from spec_space.cache import parse_dimacs
+from spec_space.counting import ModelCounter, CountingTimeout
+
+
+class ApproxCounter(ModelCounter):
+    '''
+    Estimates model counts by hashing with random XOR constraints. The
+    counted variables are those listed in a 'c ind' line of the CNF, or all
+    variables if there is none; other variables must be determined by them,
+    as the auxiliary variables of a Tseitin encoding are. If the time budget
+    runs out, CountingTimeout is raised; it is checked after every model
+    found and every cell counted.
+    '''
+
+    def __init__(self, epsilon=0.8, delta=0.2, seed=None, timeout=None):
+        '''
+        :param epsilon: tolerance; estimates are within a factor 1 + epsilon
+            of the count
+        :type epsilon: float
+        :param delta: confidence; the tolerance is met with probability at
+            least 1 - delta
+        :type delta: float
+        :param seed: seed of the random XOR constraints
+        :param timeout: time budget in seconds per count, unbounded if None
+        :type timeout: float
+        '''
+        if epsilon <= 0 or not 0 < delta < 1:
+            raise ValueError('epsilon must be positive and delta in (0, 1)')
+        self.epsilon = epsilon
+        self.delta = delta
+        self.random = random.Random(seed)
+        self.threshold = int(1 + 9.84 * (1 + epsilon / (1 + epsilon))
+                * (1 + 1 / epsilon) ** 2)
+        self.iterations = int(math.ceil(17 * math.log(3 / delta, 2)))
+        self.timeout = timeout
+
+    def count(self, dimacs):
+        '''
+        Returns an estimate of the number of models of the given DIMACS CNF.
+
+        :param dimacs: CNF in DIMACS format
+        :type dimacs: string
+        '''
+        return self.count_bounds(dimacs)[0]
+
+    def count_bounds(self, dimacs):
+        '''
+        Returns an (estimate, lower, upper) triple for the number of models
+        of the given DIMACS CNF. The count lies between lower and upper with
+        probability at least 1 - delta; if the CNF has few models, they are
+        counted exactly and all three coincide.
+
+        :param dimacs: CNF in DIMACS format
+        :type dimacs: string
+        '''
+        nvars, clauses = parse_dimacs(dimacs)
+        if any(not clause for clause in clauses):
+            return 0, 0, 0
+        counted = self.__counted_variables(dimacs, nvars)
+        deadline = None
+        if self.timeout is not None:
+            deadline = time.time() + self.timeout
+
+        exact = self.__bounded_count(nvars, clauses, deadline)
+        if exact < self.threshold:
+            return exact, exact, exact
+
+        estimates = []
+        m = 1
+        for _ in range(self.iterations):
+            xors = [self.__random_xor(counted) for _ in range(len(counted))]
+            m, cell = self.__search(nvars, clauses, xors, m, deadline)
+            estimates.append(cell << m)
+        estimates.sort()
+        estimate = estimates[len(estimates) // 2]
+
+        lower = int(math.floor(estimate / (1 + self.epsilon)))
+        upper = min(int(math.ceil(estimate * (1 + self.epsilon))),
+                1 << len(counted))
+        return estimate, lower, upper
+
+    @staticmethod
+    def __counted_variables(dimacs, nvars):
+        for line in dimacs.splitlines():
+            if line.startswith('c ind'):
+                return [int(v) for v in line.split()[2:] if v != '0']
+        return list(range(1, nvars + 1))
+
+    def __random_xor(self, variables):
+        '''
+        Returns a random XOR constraint: a random subset of the variables
+        and the parity of their sum.
+        '''
+        return ([v for v in variables if self.random.random() < 0.5],
+                self.random.random() < 0.5)
+
+    def __search(self, nvars, clauses, xors, m, deadline):
+        '''
+        Returns the smallest number m of the given XOR constraints for which
+        the cell has fewer models than the threshold, and the number of
+        models in that cell. The search starts at the given m, since
+        consecutive iterations tend to end near each other.
+        '''
+        m = min(max(m, 1), len(xors))
+        cell = self.__bounded_count(nvars, clauses, deadline, xors[:m])
+        if cell >= self.threshold:
+            while cell >= self.threshold and m < len(xors):
+                m += 1
+                cell = self.__bounded_count(nvars, clauses, deadline, xors[:m])
+            return m, cell
+        while m > 1:
+            smaller = self.__bounded_count(nvars, clauses, deadline,
+                    xors[:m-1])
+            if smaller >= self.threshold:
+                break
+            m -= 1
+            cell = smaller
+        return m, cell
+
+    def __bounded_count(self, nvars, clauses, deadline, xors=()):
+        '''
+        Returns the number of models of the clauses and XOR constraints, or
+        the threshold if there are at least that many. Raises
+        CountingTimeout if the deadline, if any, passes.
+        '''
+        self.__check(deadline)
+        clauses = list(clauses)
+        total = nvars
+        for variables, parity in xors:
+            total = self.__encode_xor(variables, parity, total, clauses)
+        if () in clauses:
+            return 0
+        if total == 0:
+            return 1
+        found = 0
+        for _ in picosat.satisfy_all(total, clauses):
+            found += 1
+            if found >= self.threshold:
+                break
+            self.__check(deadline)
+        return found
+
+    def __check(self, deadline):
+        if deadline is not None and time.time() > deadline:
+            raise CountingTimeout('approximate counting exceeded %s seconds'
+                    % self.timeout)
+
+    @staticmethod
+    def __encode_xor(variables, parity, total, clauses):
+        '''
+        Adds clauses stating that the XOR of the variables equals parity,
+        introducing one auxiliary variable per step of the chain. Returns
+        the new number of variables.
+        '''
+        if not variables:
+            if parity:
+                clauses.append(())
+            return total
+        acc = variables[0]
+        for v in variables[1:]:
+            total += 1
+            t = total
+            ''' t <-> acc xor v '''
+            clauses.extend([(-t, acc, v), (-t, -acc, -v),
+                    (t, -acc, v), (t, acc, -v)])
+            acc = t
+        clauses.append((acc,) if parity else (-acc,))
+        return total
@@ -0,0 +1,369 @@
+'''
+This module contains an automaton-based engine that measures LTL formulas
+under large time bounds without unrolling them.
+
+Under bounded semantics, the value of a formula at time i only depends on
+the valuation of the literals at time i and on the values at time i+1 of
+its temporal subformulas (the operands of Next, and the Globally,
+Eventually, Until, WeakUntil and Release subformulas themselves), through
+their one-step recurrences. Beyond the bound, all of these have constant
+values. Reading a trace backwards, from the bound to time 0, is therefore a
+deterministic transition system whose states are the values of the temporal
+subformulas; with uniformly random valuations, it is a Markov chain.
+
+The measure under time bound N is the probability that, after N steps from
+the state beyond the bound, the last valuation makes the formula true. The
+chain is built once per formula by exploring its reachable states, and the
+distribution over states is advanced by sparse matrix-vector products, or
+by powers of the transition matrix computed by squaring when the chain is
+small; the cost is polynomial in the number of states, and linear or
+logarithmic in N.
+
+Transitions are computed for all valuations of the literals at once, with
+the bit-parallel truth tables of spec_space.truthtable, so the engine suits
+formulas over a moderate number of literals.
+'''
+
+import math
+
+import numpy as np
+
+from spec_space.formula import TrueFormula, FalseFormula, Literal, Negation, \
+        Conjunction, Disjunction, Next, VarNext, Globally, Eventually, Until, \
+        WeakUntil, Release, BinaryFormula, UnaryFormula
+from spec_space.numeric import NUMERICS, ratio
+from spec_space.truthtable import variable_table
+
+TEMPORAL = (Globally, Eventually, Until, WeakUntil, Release)
+
+
+def structure(f):
+    '''
+    Returns a hashable representation of the structure of f, equal for
+    structurally equal formulas.
+    '''
+    if isinstance(f, Literal):
+        return (f.Symbol, f.generate(with_base_names=True))
+    if isinstance(f, BinaryFormula):
+        return (f.Symbol, structure(f.left_formula), structure(f.right_formula))
+    if isinstance(f, UnaryFormula):
+        return (f.Symbol, structure(f.right_formula))
+    return (f.Symbol,)
+
+
+class MarkovChain(object):
+    '''
+    The transition system of a formula, read backwards over uniformly
+    random valuations. States are integers whose bit j is the value of the
+    j-th tracked subformula one step later. weights maps each state to a
+    dict of successor states and the numbers of valuations leading to them;
+    accepting maps each state to the number of valuations for which the
+    formula holds.
+    '''
+
+    def __init__(self, formula):
+        '''
+        :param formula: formula simplified to literals, constants, negation,
+            conjunction, disjunction, next, globally, eventually, until,
+            weak until and release
+        :type formula: LTLFormula
+        '''
+        self.formula = formula
+        self.keys = {}
+        self.literals = []
+        self.tracked = []
+        self.__collect(formula, set())
+        self.literals.sort()
+        self.bit = dict((key, 1 << j) for j, (key, _) in enumerate(self.tracked))
+        self.size = 1 << len(self.literals)
+        self.full = (1 << self.size) - 1
+        self.variables = [variable_table(i, self.size)
+                for i in range(len(self.literals))]
+
+        self.initial = 0
+        for key, g in self.tracked:
+            if tail(g):
+                self.initial |= self.bit[key]
+        self.states = [self.initial]
+        self.index = {self.initial: 0}
+        self.weights = {}
+        self.accepting = {}
+        for s in self.states:
+            self.__explore(s)
+
+    def __key(self, f):
+        ''' Subformulas are identified by their structure; the key of each
+            node is computed once. '''
+        if id(f) not in self.keys:
+            self.keys[id(f)] = (structure(f), f)
+        return self.keys[id(f)][0]
+
+    def __collect(self, f, seen):
+        '''
+        Collects the literals and the tracked subformulas of f, children
+        first.
+        '''
+        key = self.__key(f)
+        if key in seen:
+            return
+        seen.add(key)
+        if isinstance(f, BinaryFormula):
+            self.__collect(f.left_formula, seen)
+            self.__collect(f.right_formula, seen)
+        elif isinstance(f, UnaryFormula):
+            self.__collect(f.right_formula, seen)
+        if isinstance(f, Literal):
+            self.literals.append(f.generate(with_base_names=True))
+        tracked = dict(self.tracked)
+        if isinstance(f, Next) or isinstance(f, VarNext):
+            g = f.right_formula
+            if self.__key(g) not in tracked:
+                self.tracked.append((self.__key(g), g))
+        if isinstance(f, TEMPORAL) and key not in tracked:
+            self.tracked.append((key, f))
+
+    def __explore(self, state):
+        '''
+        Computes the transitions and acceptance count of the given state,
+        and appends its new successors to the states.
+        '''
+        tables = {}
+        root = self.__table(self.formula, state, tables)
+        self.accepting[state] = bin(root).count('1')
+
+        ''' Split the valuations by the value of each tracked subformula;
+            each class leads to one successor. '''
+        classes = {0: self.full}
+        for key, g in self.tracked:
+            t = self.__table(g, state, tables)
+            split = {}
+            for succ, c in classes.items():
+                if c & t:
+                    split[succ | self.bit[key]] = c & t
+                if c & ~t:
+                    split[succ] = c & ~t
+            classes = split
+
+        weights = {}
+        for succ, c in classes.items():
+            weights[succ] = bin(c).count('1')
+            if succ not in self.index:
+                self.index[succ] = len(self.states)
+                self.states.append(succ)
+        self.weights[state] = weights
+
+    def __table(self, f, state, tables):
+        '''
+        Returns the truth table of f at the current step over all
+        valuations, given the values of the tracked subformulas one step
+        later.
+        '''
+        key = self.__key(f)
+        if key in tables:
+            return tables[key]
+
+        def later(g):
+            return self.full if state & self.bit[self.__key(g)] else 0
+
+        if isinstance(f, TrueFormula):
+            t = self.full
+        elif isinstance(f, FalseFormula):
+            t = 0
+        elif isinstance(f, Literal):
+            t = self.variables[self.literals.index(f.generate(with_base_names=True))]
+        elif isinstance(f, Negation):
+            t = self.full ^ self.__table(f.right_formula, state, tables)
+        elif isinstance(f, Conjunction):
+            t = self.__table(f.left_formula, state, tables) \
+                    & self.__table(f.right_formula, state, tables)
+        elif isinstance(f, Disjunction):
+            t = self.__table(f.left_formula, state, tables) \
+                    | self.__table(f.right_formula, state, tables)
+        elif isinstance(f, Next) or isinstance(f, VarNext):
+            t = later(f.right_formula)
+        elif isinstance(f, Globally):
+            t = self.__table(f.right_formula, state, tables) & later(f)
+        elif isinstance(f, Eventually):
+            t = self.__table(f.right_formula, state, tables) | later(f)
+        elif isinstance(f, Until) or isinstance(f, WeakUntil):
+            t = self.__table(f.right_formula, state, tables) \
+                    | (self.__table(f.left_formula, state, tables) & later(f))
+        elif isinstance(f, Release):
+            t = self.__table(f.right_formula, state, tables) \
+                    & (self.__table(f.left_formula, state, tables) | later(f))
+        else:
+            raise Exception("Unsupported AST node: " + type(f).__name__)
+        tables[key] = t
+        return t
+
+    def edges(self):
+        '''
+        Returns the transitions as (source, target, weight) arrays of state
+        indexes and valuation counts.
+        '''
+        src, dst, weight = [], [], []
+        for s, weights in self.weights.items():
+            for succ, w in weights.items():
+                src.append(self.index[s])
+                dst.append(self.index[succ])
+                weight.append(w)
+        return src, dst, weight
+
+
+def tail(f):
+    '''
+    Returns the value of f beyond the time bound.
+    '''
+    if isinstance(f, TrueFormula):
+        return True
+    if isinstance(f, FalseFormula) or isinstance(f, Literal):
+        return False
+    if isinstance(f, Negation):
+        return not tail(f.right_formula)
+    if isinstance(f, Conjunction):
+        return tail(f.left_formula) and tail(f.right_formula)
+    if isinstance(f, Disjunction):
+        return tail(f.left_formula) or tail(f.right_formula)
+    if isinstance(f, Next) or isinstance(f, VarNext):
+        return tail(f.right_formula)
+    if isinstance(f, Eventually) or isinstance(f, Until):
+        return False
+    if isinstance(f, TEMPORAL):
+        return True
+    raise Exception("Unsupported AST node: " + type(f).__name__)
+
+
+class AutomatonEngine(object):
+    '''
+    Measures simplified formulas under any time bound with their Markov
+    chains. Chains and the furthest distribution computed are kept per
+    formula, so measuring a formula under increasing bounds (or sweeping
+    them) advances the same distribution. With the 'float' numeric,
+    distributions are probabilities in NumPy arrays; otherwise, they are
+    exact counts of valuations in Python integers, which are converted to
+    the numeric at the end.
+    '''
+
+    def __init__(self, numeric='float', dense_limit=64):
+        '''
+        :param numeric: number representation of measures (see
+            spec_space.numeric)
+        :type numeric: string
+        :param dense_limit: maximal number of states of a chain whose
+            transition matrix may be raised to powers by squaring
+        :type dense_limit: int
+        '''
+        if numeric not in NUMERICS:
+            raise ValueError("numeric must be one of " + ", ".join(NUMERICS))
+        self.numeric = numeric
+        self.dense_limit = dense_limit
+        self.runs = {}
+
+    def measure(self, formula, time_bound):
+        '''
+        Returns the measure of the given simplified formula under the given
+        time bound.
+        '''
+        key = structure(formula)
+        if key not in self.runs:
+            self.runs[key] = Run(MarkovChain(formula), self.numeric == 'float')
+        run = self.runs[key]
+        count = run.accepted(time_bound, self.dense_limit)
+        if self.numeric == 'float':
+            return count
+        return ratio(count, len(run.chain.literals) * (time_bound + 1),
+                self.numeric)
+
+
+class Run(object):
+    '''
+    The distribution over the states of a chain after some number of steps,
+    and the acceptance counts (or probabilities) found on the way.
+    '''
+
+    def __init__(self, chain, probabilities):
+        '''
+        :param chain: chain to run
+        :type chain: MarkovChain
+        :param probabilities: if true, distributions are float probabilities;
+            otherwise, integer counts of valuations
+        :type probabilities: bool
+        '''
+        self.chain = chain
+        self.probabilities = probabilities
+        n = len(chain.states)
+        src, dst, weight = chain.edges()
+        accepting = [chain.accepting[s] for s in chain.states]
+        if probabilities:
+            self.src = np.array(src, dtype=np.intp)
+            self.dst = np.array(dst, dtype=np.intp)
+            self.weight = np.array(weight, dtype=float) / chain.size
+            self.accepting = np.array(accepting, dtype=float) / chain.size
+            self.start = np.zeros(n)
+            self.start[0] = 1.0
+        else:
+            self.src, self.dst, self.weight = src, dst, weight
+            self.accepting = accepting
+            self.start = [1] + [0] * (n - 1)
+        self.steps = 0
+        self.vector = self.start
+        self.found = {}
+
+    def accepted(self, steps, dense_limit):
+        '''
+        Returns the acceptance count (or probability) after the given
+        number of steps.
+        '''
+        if steps in self.found:
+            return self.found[steps]
+        if steps < self.steps:
+            self.steps, self.vector = 0, self.start
+        remaining = steps - self.steps
+        n = len(self.chain.states)
+        if n <= dense_limit and remaining > 1 \
+                and n ** 3 * math.log2(remaining) < remaining * len(self.src):
+            self.vector = self.__dot(self.vector, self.__power(remaining))
+            self.steps = steps
+        while self.steps < steps:
+            self.vector = self.__step(self.vector)
+            self.steps += 1
+            self.found[self.steps] = self.__dot(self.vector, self.accepting)
+        if steps not in self.found:
+            self.found[steps] = self.__dot(self.vector, self.accepting)
+        return self.found[steps]
+
+    def __step(self, vector):
+        if self.probabilities:
+            return np.bincount(self.dst, weights=vector[self.src] * self.weight,
+                    minlength=len(vector))
+        new = [0] * len(vector)
+        for s, t, w in zip(self.src, self.dst, self.weight):
+            if vector[s]:
+                new[t] += vector[s] * w
+        return new
+
+    def __power(self, exponent):
+        ''' The transition matrix to the given power, by squaring. '''
+        n = len(self.chain.states)
+        dtype = float if self.probabilities else object
+        matrix = np.zeros((n, n), dtype=dtype)
+        for s, t, w in zip(self.src, self.dst, self.weight):
+            matrix[s, t] += w
+        result = np.identity(n, dtype=dtype)
+        if not self.probabilities:
+            result = np.array([[int(x) for x in row] for row in result],
+                    dtype=object)
+        while exponent:
+            if exponent & 1:
+                result = result.dot(matrix)
+            exponent >>= 1
+            if exponent:
+                matrix = matrix.dot(matrix)
+        return result
+
+    def __dot(self, vector, other):
+        if self.probabilities:
+            return vector.dot(other)
+        if isinstance(other, np.ndarray):
+            return list(np.array(vector, dtype=object).dot(other))
+        return sum(x * y for x, y in zip(vector, other))
@@ -0,0 +1,223 @@
+'''
+This module contains a model counter based on reduced ordered binary
+decision diagrams (BDDs).
+
+BDDs are built bottom-up from the unrolling DAG of a formula, with the
+(literal, time) variables ordered by time first. For bounded LTL this order
+keeps G/F chains and Until recursions small: the value of a subformula at
+time t only depends on variables at t and later. Once built, a BDD counts
+its models in time linear in its size. The number of BDD nodes is bounded,
+so that formulas with an unfortunate structure can be handed to a SAT
+counter instead.
+'''
+
+from spec_space.unroll import FALSE as DAG_FALSE, TRUE as DAG_TRUE
+
+''' Node ids of the terminals '''
+ZERO = 0
+ONE = 1
+
+
+class BDD(object):
+    '''
+    A store of BDD nodes over (literal, time) variables. Nodes are referred
+    to by integer ids and are stored as (key, low, high) triples, where key
+    is the (time, literal) pair of the decision variable; nodes are
+    ordered by key, i.e., by time and then by literal. The store holds at
+    most max_nodes nodes.
+    '''
+
+    def __init__(self, max_nodes=100000):
+        '''
+        :param max_nodes: maximal number of nodes in the store
+        :type max_nodes: int
+        '''
+        self.max_nodes = max_nodes
+        self.clear()
+
+    def clear(self):
+        '''
+        Removes all nodes except the terminals.
+        '''
+        self.nodes = [None, None]
+        self.unique = {}
+        self.computed = {}
+
+    def __node(self, key, low, high):
+        if low == high:
+            return low
+        triple = (key, low, high)
+        u = self.unique.get(triple)
+        if u is None:
+            if len(self.nodes) >= self.max_nodes:
+                raise BDDLimitError('more than %d BDD nodes' % self.max_nodes)
+            u = len(self.nodes)
+            self.nodes.append(triple)
+            self.unique[triple] = u
+        return u
+
+    def var(self, literal, time):
+        '''
+        Returns the BDD of the variable (literal, time).
+        '''
+        return self.__node((time, literal), ZERO, ONE)
+
+    def neg(self, u):
+        '''
+        Returns the negation of BDD u.
+        '''
+        if u == ZERO:
+            return ONE
+        if u == ONE:
+            return ZERO
+        memo = ('not', u)
+        if memo not in self.computed:
+            key, low, high = self.nodes[u]
+            self.computed[memo] = self.__node(key, self.neg(low), self.neg(high))
+        return self.computed[memo]
+
+    def conj(self, u, v):
+        '''
+        Returns the conjunction of BDDs u and v.
+        '''
+        return self.__apply('and', u, v)
+
+    def disj(self, u, v):
+        '''
+        Returns the disjunction of BDDs u and v.
+        '''
+        return self.__apply('or', u, v)
+
+    def __apply(self, op, u, v):
+        absorbing, neutral = (ZERO, ONE) if op == 'and' else (ONE, ZERO)
+        if u == absorbing or v == absorbing:
+            return absorbing
+        if u == neutral:
+            return v
+        if v == neutral or u == v:
+            return u
+        if u > v:
+            u, v = v, u
+        memo = (op, u, v)
+        if memo not in self.computed:
+            ukey, ulow, uhigh = self.nodes[u]
+            vkey, vlow, vhigh = self.nodes[v]
+            if ukey == vkey:
+                node = self.__node(ukey, self.__apply(op, ulow, vlow),
+                        self.__apply(op, uhigh, vhigh))
+            elif ukey < vkey:
+                node = self.__node(ukey, self.__apply(op, ulow, v),
+                        self.__apply(op, uhigh, v))
+            else:
+                node = self.__node(vkey, self.__apply(op, u, vlow),
+                        self.__apply(op, u, vhigh))
+            self.computed[memo] = node
+        return self.computed[memo]
+
+    def count(self, u, variables):
+        '''
+        Returns the number of models of BDD u over the given variables,
+        which must include all variables that u depends on.
+
+        :param variables: (literal, time) variables
+        :type variables: list
+        '''
+        keys = sorted((time, literal) for literal, time in variables)
+        level = dict((key, i) for i, key in enumerate(keys))
+        depth = len(keys)
+
+        def level_of(x):
+            if x == ZERO or x == ONE:
+                return depth
+            return level[self.nodes[x][0]]
+
+        counts = {ZERO: 0, ONE: 1}
+        stack = [u]
+        while stack:
+            x = stack[-1]
+            if x in counts:
+                stack.pop()
+                continue
+            key, low, high = self.nodes[x]
+            if low in counts and high in counts:
+                stack.pop()
+                here = level[key]
+                counts[x] = (counts[low] << (level_of(low) - here - 1)) \
+                        + (counts[high] << (level_of(high) - here - 1))
+            else:
+                stack.append(low)
+                stack.append(high)
+        return counts[u] << level_of(u)
+
+
+class BDDCounter(object):
+    '''
+    Counts the models of nodes of a BooleanDAG by building their BDDs. The
+    BDDs of all DAG nodes built so far are kept, so subformulas shared
+    between counts are built once. If the store fills up, it is cleared and
+    the count is attempted once more from scratch; if that fails as well,
+    BDDLimitError is raised.
+    '''
+
+    def __init__(self, dag, max_nodes=100000):
+        '''
+        :param dag: DAG whose nodes are counted
+        :type dag: BooleanDAG
+        :param max_nodes: maximal number of BDD nodes kept
+        :type max_nodes: int
+        '''
+        self.dag = dag
+        self.bdd = BDD(max_nodes)
+        self.built = {DAG_FALSE: ZERO, DAG_TRUE: ONE}
+
+    def count(self, root):
+        '''
+        Returns a (count, nvars) pair for the given DAG node: the number of
+        models over, and the number of, the variables it depends on.
+        '''
+        variables = self.dag.variables(root)
+        try:
+            u = self.build(root)
+        except BDDLimitError:
+            self.bdd.clear()
+            self.built = {DAG_FALSE: ZERO, DAG_TRUE: ONE}
+            u = self.build(root)
+        return self.bdd.count(u, variables), len(variables)
+
+    def build(self, root):
+        '''
+        Returns the BDD of the given DAG node.
+        '''
+        for x in self.dag.reachable(root):
+            if x in self.built:
+                continue
+            op, args = self.dag.nodes[x]
+            if op == 'var':
+                u = self.bdd.var(*args)
+            elif op == 'not':
+                u = self.bdd.neg(self.built[args])
+            else:
+                ''' Combine the latest variables first, to keep the
+                    intermediate results small. '''
+                operands = sorted((self.built[y] for y in args),
+                        key=self.__top, reverse=True)
+                u = operands[0]
+                for v in operands[1:]:
+                    if op == 'and':
+                        u = self.bdd.conj(u, v)
+                    else:
+                        u = self.bdd.disj(u, v)
+            self.built[x] = u
+        return self.built[root]
+
+    def __top(self, u):
+        if u == ZERO or u == ONE:
+            return (float('inf'),)
+        return self.bdd.nodes[u][0]
+
+
+class BDDLimitError(Exception):
+    '''
+    Raised if a BDD does not fit in the node store
+    '''
+    pass
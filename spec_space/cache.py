@@ -0,0 +1,215 @@
+'''
+This module contains a persistent model count cache. Counts are stored in
+an SQLite database, keyed by a hash of a canonical form of the CNF, so that
+repeated runs over the same specifications need not count again. Counts can
+also be stored by the Boolean expression they were computed from, which
+saves the CNF conversion on a hit.
+'''
+
+import hashlib
+import sqlite3
+from threading import Lock
+
+
+def parse_dimacs(dimacs):
+    '''
+    Returns the number of variables and the list of clauses of a DIMACS CNF.
+
+    :param dimacs: CNF in DIMACS format
+    :type dimacs: string
+    '''
+    nvars = 0
+    clauses = []
+    for line in dimacs.splitlines():
+        line = line.strip()
+        if not line or line[0] == 'c':
+            continue
+        if line[0] == 'p':
+            nvars = int(line.split()[2])
+            continue
+        clauses.append(tuple(int(lit) for lit in line.split() if lit != '0'))
+    return nvars, clauses
+
+
+def canonicalize(clauses):
+    '''
+    Returns a canonical version of the given clauses: literals and clauses
+    are sorted, duplicates are removed and variables are renumbered in order
+    of first occurrence. Renumbering and sorting are repeated until they no
+    longer change the result, so that CNFs that only differ in the order of
+    their clauses or the numbering of their variables usually coincide.
+
+    :param clauses: clauses as sequences of non-zero integers
+    :type clauses: list
+    '''
+    current = sorted(set(tuple(sorted(set(c), key=abs)) for c in clauses))
+
+    for _ in range(8):
+        numbering = {}
+        for clause in current:
+            for lit in clause:
+                if abs(lit) not in numbering:
+                    numbering[abs(lit)] = len(numbering) + 1
+        renamed = sorted(set(
+            tuple(sorted((numbering[abs(lit)] if lit > 0 else -numbering[abs(lit)]
+                for lit in clause), key=abs))
+            for clause in current))
+        if renamed == current:
+            break
+        current = renamed
+
+    return current
+
+
+def cnf_key(nvars, clauses):
+    '''
+    Returns the cache key of a CNF: a hash of its canonical form.
+    '''
+    canonical = canonicalize(clauses)
+    text = '%d\n' % nvars + '\n'.join(' '.join(str(lit) for lit in clause)
+            for clause in canonical)
+    return hashlib.sha1(text.encode('UTF-8')).hexdigest()
+
+
+def expression_key(expression):
+    '''
+    Returns the cache key of a Boolean expression string.
+    '''
+    return hashlib.sha1(expression.encode('UTF-8')).hexdigest()
+
+
+class CountCache(object):
+    '''
+    Persistent map from CNFs and expressions to model counts. The number of
+    entries is bounded; when full, the least recently used entries are
+    evicted. Hits are only recorded in memory, and written to the database
+    with the next put, flush or close, so that lookups do not write.
+    '''
+
+    def __init__(self, path, max_entries=1000000):
+        '''
+        :param path: location of the SQLite database; created if missing
+        :type path: string
+        :param max_entries: maximal number of stored counts
+        :type max_entries: int
+        '''
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.__lock = Lock()
+        self.__touched = {}
+        self.__db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.__db.execute('CREATE TABLE IF NOT EXISTS counts '
+                '(key TEXT PRIMARY KEY, count TEXT, nvars INTEGER, used INTEGER)')
+        self.__db.execute('CREATE INDEX IF NOT EXISTS counts_used '
+                'ON counts (used)')
+        self.__db.commit()
+
+    def __tick(self):
+        '''
+        Returns a new, increasing usage stamp.
+        '''
+        row = self.__db.execute('SELECT MAX(used) FROM counts').fetchone()
+        return (row[0] or 0) + 1
+
+    def __get(self, key):
+        '''
+        Returns the (count, nvars) row stored under the given key, or None.
+        '''
+        with self.__lock:
+            row = self.__db.execute('SELECT count, nvars FROM counts '
+                    'WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            ''' Move the key to the end of the recency order. '''
+            self.__touched.pop(key, None)
+            self.__touched[key] = True
+            return int(row[0]), row[1]
+
+    def __flush(self):
+        '''
+        Writes the usage stamps of the entries hit since the last flush, in
+        the order of their last hit. The lock must be held; the caller
+        commits.
+        '''
+        if not self.__touched:
+            return
+        start = self.__tick()
+        self.__db.executemany('UPDATE counts SET used = ? WHERE key = ?',
+                ((start + i, key) for i, key in enumerate(self.__touched)))
+        self.__touched = {}
+
+    def __put(self, key, count, nvars):
+        '''
+        Stores a (count, nvars) row under the given key, evicting the least
+        recently used entries if the cache is full.
+        '''
+        with self.__lock:
+            self.__flush()
+            self.__db.execute('INSERT OR REPLACE INTO counts VALUES (?, ?, ?, ?)',
+                    (key, str(count), nvars, self.__tick()))
+            self.__db.execute('DELETE FROM counts WHERE used <= ('
+                    'SELECT used FROM counts ORDER BY used DESC '
+                    'LIMIT 1 OFFSET ?)', (self.max_entries,))
+            self.__db.commit()
+
+    def get(self, dimacs):
+        '''
+        Returns the model count of the given DIMACS CNF, or None if it is
+        not cached.
+        '''
+        row = self.__get('cnf:' + cnf_key(*parse_dimacs(dimacs)))
+        if row is None:
+            return None
+        return row[0]
+
+    def put(self, dimacs, count):
+        '''
+        Stores the model count of the given DIMACS CNF.
+        '''
+        nvars, clauses = parse_dimacs(dimacs)
+        self.__put('cnf:' + cnf_key(nvars, clauses), count, nvars)
+
+    def get_expression(self, expression):
+        '''
+        Returns a (count, nvars) pair for the given Boolean expression, or None
+        if it is not cached. The measure of the expression is count/2**nvars.
+        '''
+        return self.__get('expr:' + expression_key(expression))
+
+    def put_expression(self, expression, count, nvars):
+        '''
+        Stores the model count of the given Boolean expression over nvars
+        variables.
+        '''
+        self.__put('expr:' + expression_key(expression), count, nvars)
+
+    def __len__(self):
+        with self.__lock:
+            return self.__db.execute('SELECT COUNT(*) FROM counts').fetchone()[0]
+
+    def stats(self):
+        '''
+        Returns a dictionary with the number of hits, misses and entries.
+        '''
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self)}
+
+    def flush(self):
+        '''
+        Writes the pending usage stamps to the database.
+        '''
+        with self.__lock:
+            self.__flush()
+            self.__db.commit()
+
+    def close(self):
+        '''
+        Writes the pending usage stamps and closes the underlying database.
+        '''
+        with self.__lock:
+            self.__flush()
+            self.__db.commit()
+            self.__db.close()
@@ -0,0 +1,115 @@
+'''
+This module contains a direct encoder from bounded LTL formulas to CNF.
+
+The encoder unrolls the formula with time indexes into a Boolean DAG and
+introduces one Tseitin variable per gate, defined by an equivalence with
+its inputs. The resulting CNF is linear in the size of the DAG, and, because
+every auxiliary variable is determined by the original (literal, time)
+variables, it has exactly as many models as the unrolled formula has over
+the original variables. These are numbered first, so the CNF is also a
+projection onto variables 1 to nprimary.
+'''
+
+from spec_space.unroll import Unroller, FALSE, TRUE
+
+
+class TseitinCNF(object):
+    '''
+    A CNF over nvars variables, of which the first nprimary stand for
+    (literal, time) pairs and the rest are auxiliary gate variables.
+    '''
+
+    def __init__(self, nprimary, nvars, clauses, names=None):
+        '''
+        :param nprimary: number of (literal, time) variables
+        :type nprimary: int
+        :param nvars: total number of variables
+        :type nvars: int
+        :param clauses: clauses as tuples of non-zero integers
+        :type clauses: list
+        :param names: (literal, time) pair of each primary variable
+        :type names: list
+        '''
+        self.nprimary = nprimary
+        self.nvars = nvars
+        self.clauses = clauses
+        self.names = names
+
+    def dimacs(self):
+        '''
+        Returns the CNF in DIMACS format. The primary variables are listed
+        in a 'c ind' line, for counters that support projection.
+        '''
+        lines = ['p cnf %d %d' % (self.nvars, len(self.clauses))]
+        if self.nprimary < self.nvars:
+            lines.append('c ind %s 0' % ' '.join(str(v)
+                    for v in range(1, self.nprimary + 1)))
+        lines.extend(' '.join(str(lit) for lit in clause) + ' 0'
+                for clause in self.clauses)
+        return '\n'.join(lines)
+
+
+class TseitinEncoder(object):
+    '''
+    Encodes LTL formulas, unrolled up to a time bound, into CNF. The
+    unrolling is delegated to an Unroller, whose hash-consed DAG may be
+    shared between encoders; every DAG node reachable from the encoded root
+    becomes at most one CNF variable.
+    '''
+
+    def __init__(self, time_bound, unroller=None):
+        '''
+        :param time_bound: last time index of the unrolling
+        :type time_bound: int
+        :param unroller: unroller to use; a new one by default
+        :type unroller: Unroller
+        '''
+        if unroller is None:
+            unroller = Unroller(time_bound)
+        self.time_bound = time_bound
+        self.unroller = unroller
+
+    def encode(self, formula, n=0):
+        '''
+        Encodes the given formula at time offset n. Returns True or False if
+        the unrolling is constant, and a TseitinCNF otherwise.
+        '''
+        return self.encode_node(self.unroller.unroll(formula, n))
+
+    def encode_node(self, root):
+        '''
+        Encodes the formula rooted at the given node of the unroller's DAG.
+        Returns True or False if the node is constant, and a TseitinCNF
+        otherwise.
+        '''
+        dag = self.unroller.dag
+        if root == FALSE or root == TRUE:
+            return root == TRUE
+
+        order = dag.reachable(root)
+        lits = {}
+        names = []
+        for x in order:
+            op, args = dag.nodes[x]
+            if op == 'var':
+                names.append(args)
+                lits[x] = len(names)
+        nprimary = len(names)
+
+        nvars = nprimary
+        clauses = []
+        for x in order:
+            op, args = dag.nodes[x]
+            if op == 'not':
+                lits[x] = -lits[args]
+            elif op == 'and' or op == 'or':
+                nvars += 1
+                g = nvars
+                sign = 1 if op == 'and' else -1
+                for y in args:
+                    clauses.append((-sign * g, sign * lits[y]))
+                clauses.append(tuple([sign * g] + [-sign * lits[y] for y in args]))
+                lits[x] = g
+        clauses.append((lits[root],))
+
+        return TseitinCNF(nprimary, nvars, clauses, names)
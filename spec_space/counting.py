@@ -0,0 +1,351 @@
+'''
+This module contains the model counters used to measure Boolean expansions
+of LTL formulas. All counters implement the ModelCounter interface: SharpSAT
+runs the external sharpSAT solver, DPLLCounter counts in-process, and
+SelectingCounter chooses between two counters by the size of the CNF, so
+that small instances do not pay for starting a process.
+'''
+
+import os
+import re
+import tempfile
+import time
+from subprocess import check_output, CalledProcessError, TimeoutExpired
+
+from spec_space import LOG
+from spec_space.cache import parse_dimacs
+
+''' Location of the sharpSAT binary unless configured otherwise: bin/sharpSAT
+    in the repository root, whatever the working directory '''
+DEFAULT_SHARPSAT = os.environ.get('SPEC_SPACE_SHARPSAT', os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'bin', 'sharpSAT'))
+
+''' Memory-backed scratch directory, used for CNF files when available '''
+SHM_DIR = '/dev/shm'
+
+
+class ModelCounter(object):
+    '''
+    Interface of model counters.
+    '''
+
+    ''' True if count_many counts concurrently by itself '''
+    concurrent = False
+
+    def count(self, dimacs):
+        '''
+        Returns the number of models of the given DIMACS CNF, over all the
+        variables declared in its header.
+
+        :param dimacs: CNF in DIMACS format
+        :type dimacs: string
+        '''
+        raise NotImplementedError
+
+    def count_many(self, dimacs_list):
+        '''
+        Returns the numbers of models of the given DIMACS CNFs, in order.
+
+        :param dimacs_list: CNFs in DIMACS format
+        :type dimacs_list: list
+        '''
+        return [self.count(dimacs) for dimacs in dimacs_list]
+
+    def try_count_many(self, dimacs_list):
+        '''
+        Returns the numbers of models of the given DIMACS CNFs, in order,
+        with None for each CNF whose count failed. Failures are logged.
+
+        :param dimacs_list: CNFs in DIMACS format
+        :type dimacs_list: list
+        '''
+        counts = []
+        for dimacs in dimacs_list:
+            try:
+                counts.append(self.count(dimacs))
+            except CountingError as e:
+                LOG.warning("model counting failed: %s" % e)
+                counts.append(None)
+        return counts
+
+
+class SharpSAT(ModelCounter):
+    '''
+    Counts the models of a DIMACS CNF by running the sharpSAT binary.
+    Every call writes to its own scratch file (on tmpfs when available), or
+    pipes the CNF to the solver, so calls can safely run concurrently from
+    the same working directory.
+    '''
+
+    def __init__(self, binary=None, tmpdir=None, pipe=False, timeout=None,
+            memory=None):
+        '''
+        :param binary: path to the sharpSAT executable
+        :type binary: string
+        :param tmpdir: directory for scratch files; defaults to /dev/shm if
+            writable, otherwise to the system temporary directory
+        :type tmpdir: string
+        :param pipe: if true, the CNF is passed to sharpSAT through
+            /dev/stdin instead of a scratch file
+        :type pipe: bool
+        :param timeout: time budget in seconds per count, unbounded if None
+        :type timeout: float
+        :param memory: address space limit of sharpSAT in bytes, unbounded if
+            None; only supported on systems with the resource module
+        :type memory: int
+        '''
+        if binary is None:
+            binary = DEFAULT_SHARPSAT
+        if tmpdir is None and os.path.isdir(SHM_DIR) \
+                and os.access(SHM_DIR, os.W_OK):
+            tmpdir = SHM_DIR
+
+        self.binary = binary
+        self.tmpdir = tmpdir
+        self.pipe = pipe
+        self.timeout = timeout
+        self.memory = memory
+
+    def count(self, dimacs):
+        '''
+        Returns the number of models of the given DIMACS CNF.
+
+        :param dimacs: CNF in DIMACS format
+        :type dimacs: string
+        '''
+        if self.pipe:
+            output = self.__run('/dev/stdin', dimacs.encode('UTF-8'))
+        else:
+            fd, path = tempfile.mkstemp(suffix='.cnf', dir=self.tmpdir)
+            try:
+                with os.fdopen(fd, 'w') as cnf_file:
+                    cnf_file.write(dimacs)
+                output = self.__run(path)
+            finally:
+                os.remove(path)
+
+        return self.parse_output(output.decode('UTF-8'))
+
+    def __run(self, path, data=None):
+        '''
+        Runs sharpSAT on the given file within the configured budgets and
+        returns its output.
+        '''
+        limit = None
+        if self.memory is not None:
+            limit = self.__limit_memory
+        try:
+            return check_output([self.binary, path], input=data,
+                    timeout=self.timeout, preexec_fn=limit)
+        except TimeoutExpired:
+            raise CountingTimeout('sharpSAT exceeded %s seconds' % self.timeout)
+        except CalledProcessError as e:
+            raise CountingError('sharpSAT failed with exit status %d' % e.returncode)
+        except OSError as e:
+            raise CountingError('cannot run sharpSAT: %s' % e)
+
+    def __limit_memory(self):
+        '''
+        Limits the address space of the current process; run in sharpSAT's
+        process before it starts.
+        '''
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (self.memory, self.memory))
+
+    @staticmethod
+    def parse_output(output):
+        '''
+        Extracts the model count from sharpSAT's output.
+        '''
+        match = re.search(r"# solutions \n([0-9]+)\n# END", output)
+        if match is None:
+            LOG.debug(output)
+            raise CountingError('unexpected sharpSAT output')
+        return int(match.group(1))
+
+
+class DPLLCounter(ModelCounter):
+    '''
+    Counts models in-process, by DPLL search with unit propagation. Before
+    branching, the remaining clauses are split into components that share
+    no variables; these are counted separately and their counts are cached,
+    so that components recurring in different branches are counted once.
+    Meant for small CNFs, where it is much faster than starting a solver.
+    '''
+
+    def __init__(self, timeout=None):
+        '''
+        :param timeout: time budget in seconds per count, unbounded if None
+        :type timeout: float
+        '''
+        self.timeout = timeout
+
+    def count(self, dimacs):
+        '''
+        Returns the number of models of the given DIMACS CNF.
+
+        :param dimacs: CNF in DIMACS format
+        :type dimacs: string
+        '''
+        nvars, clauses = parse_dimacs(dimacs)
+        clauses = [frozenset(clause) for clause in clauses]
+        if any(not clause for clause in clauses):
+            return 0
+        used = len(self.__variables(clauses))
+        deadline = None
+        if self.timeout is not None:
+            deadline = time.time() + self.timeout
+        return self.__count(clauses, {}, deadline) << (nvars - used)
+
+    @staticmethod
+    def __variables(clauses):
+        return set(abs(lit) for clause in clauses for lit in clause)
+
+    @staticmethod
+    def __assign(clauses, lit):
+        '''
+        Returns the clauses simplified by making lit true, or None if this
+        falsifies one of them.
+        '''
+        reduced = []
+        for clause in clauses:
+            if lit in clause:
+                continue
+            if -lit in clause:
+                clause = clause - {-lit}
+                if not clause:
+                    return None
+            reduced.append(clause)
+        return reduced
+
+    @staticmethod
+    def __components(clauses):
+        '''
+        Returns the clauses grouped into components that share no variables.
+        '''
+        by_var = {}
+        for i, clause in enumerate(clauses):
+            for lit in clause:
+                by_var.setdefault(abs(lit), []).append(i)
+        seen = set()
+        components = []
+        for i in range(len(clauses)):
+            if i in seen:
+                continue
+            seen.add(i)
+            component = []
+            stack = [i]
+            while stack:
+                j = stack.pop()
+                component.append(clauses[j])
+                for lit in clauses[j]:
+                    for k in by_var[abs(lit)]:
+                        if k not in seen:
+                            seen.add(k)
+                            stack.append(k)
+            components.append(component)
+        return components
+
+    def __count(self, clauses, cache, deadline):
+        '''
+        Returns the number of models of the given clauses over the variables
+        occurring in them.
+        '''
+        variables = len(self.__variables(clauses))
+        assigned = 0
+        while True:
+            unit = next((clause for clause in clauses if len(clause) == 1), None)
+            if unit is None:
+                break
+            clauses = self.__assign(clauses, next(iter(unit)))
+            if clauses is None:
+                return 0
+            assigned += 1
+
+        total = 1 << (variables - assigned - len(self.__variables(clauses)))
+        for component in self.__components(clauses):
+            key = frozenset(component)
+            if key not in cache:
+                cache[key] = self.__branch(component, cache, deadline)
+            total *= cache[key]
+            if total == 0:
+                break
+        return total
+
+    def __branch(self, clauses, cache, deadline):
+        '''
+        Counts the models of a connected set of clauses by branching on its
+        most frequent variable.
+        '''
+        if deadline is not None and time.time() > deadline:
+            raise CountingTimeout('counting exceeded %s seconds' % self.timeout)
+        occurrences = {}
+        for clause in clauses:
+            for lit in clause:
+                occurrences[abs(lit)] = occurrences.get(abs(lit), 0) + 1
+        var = max(occurrences, key=occurrences.get)
+
+        total = 0
+        for lit in (var, -var):
+            reduced = self.__assign(clauses, lit)
+            if reduced is None:
+                continue
+            free = len(occurrences) - 1 - len(self.__variables(reduced))
+            total += self.__count(reduced, cache, deadline) << free
+        return total
+
+
+class SelectingCounter(ModelCounter):
+    '''
+    Counts small CNFs with one counter and the others with another: by
+    default, CNFs within max_vars variables and max_clauses clauses are
+    counted by a DPLLCounter, and larger ones by SharpSAT.
+    '''
+
+    def __init__(self, small=None, large=None, max_vars=64, max_clauses=256):
+        '''
+        :param small: counter for small CNFs; a DPLLCounter by default
+        :type small: ModelCounter
+        :param large: counter for other CNFs; a SharpSAT instance by default
+        :type large: ModelCounter
+        :param max_vars: maximal number of variables of a small CNF
+        :type max_vars: int
+        :param max_clauses: maximal number of clauses of a small CNF
+        :type max_clauses: int
+        '''
+        if small is None:
+            small = DPLLCounter()
+        if large is None:
+            large = SharpSAT()
+        self.small = small
+        self.large = large
+        self.max_vars = max_vars
+        self.max_clauses = max_clauses
+
+    def count(self, dimacs):
+        '''
+        Returns the number of models of the given DIMACS CNF.
+
+        :param dimacs: CNF in DIMACS format
+        :type dimacs: string
+        '''
+        match = re.search(r"^p cnf (\d+) (\d+)", dimacs, re.MULTILINE)
+        if match is not None and int(match.group(1)) <= self.max_vars \
+                and int(match.group(2)) <= self.max_clauses:
+            return self.small.count(dimacs)
+        return self.large.count(dimacs)
+
+
+class CountingError(Exception):
+    '''
+    Raised if a model counter fails to produce a count
+    '''
+    pass
+
+
+class CountingTimeout(CountingError):
+    '''
+    Raised if a model counter exceeds its time budget
+    '''
+    pass
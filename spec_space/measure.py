@@ -0,0 +1,1240 @@
+'''
+Created on Sep 5, 2018
+
+Module for measuring LTL formulas.
+
+All state that depends on the time bound (dependency trackers, the model
+count cache, counting options) is held by a Measurer object, so that a
+single process can measure many formulas under many time bounds.
+
+@author: Marten Lohstroh
+'''
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import product
+from sys import argv, setrecursionlimit
+from threading import Lock
+from spec_space.parser.parser import LTL_PARSER
+from spec_space.formula import LTLFormula, TrueFormula, FalseFormula, \
+        Next, VarNext, Disjunction, Conjunction, UnaryFormula, Literal, \
+        BinaryFormula, Globally, Eventually, DoubleImplication, Implication, \
+        Negation, Until, WeakUntil, Release
+from pyeda.boolalg.expr import expr, DimacsCNF
+from spec_space.symbol_sets import PyEDASymbolSet
+from spec_space.counting import SelectingCounter, DPLLCounter, SharpSAT, \
+        CountingError
+from spec_space.workers import WorkerPool
+from spec_space.cache import CountCache
+from spec_space.cnf import TseitinEncoder
+from spec_space.unroll import Unroller
+from spec_space.bdd import BDDCounter, BDDLimitError
+from spec_space.truthtable import TruthTableCounter
+from spec_space.automaton import AutomatonEngine
+from spec_space.approx import ApproxCounter
+from spec_space.numeric import NUMERICS, Interval, ratio
+from spec_space import LOG
+import numpy as np
+
+source = PyEDASymbolSet()
+
+setrecursionlimit(100000)
+
+''' The module-level PLY parser keeps per-parse state; serialize access. '''
+_PARSE_LOCK = Lock()
+
+''' Literals are interned as small integer ids, shared by all trackers. '''
+_LITERAL_IDS = {}
+_LITERAL_NAMES = []
+_LITERAL_LOCK = Lock()
+
+''' Return the id of the given literal name, assigning one if needed. '''
+def literal_id(literal):
+    lid = _LITERAL_IDS.get(literal)
+    if lid == None:
+        with _LITERAL_LOCK:
+            lid = _LITERAL_IDS.get(literal)
+            if lid == None:
+                lid = len(_LITERAL_NAMES)
+                _LITERAL_NAMES.append(literal)
+                _LITERAL_IDS[literal] = lid
+    return lid
+
+''' Maps atomic propositions to sets of time indexes. Literals are stored by
+    their interned id, and each set of time indexes as an integer bitmask
+    whose bit t is set iff time index t is tracked, so that all operations
+    are a few integer operations per literal. '''
+class DepTracker:
+
+    ''' Constructor. '''
+    def __init__(self, literal=None, indexes=None, time_bound=None):
+        self.literals = {}
+        self.time_bound = time_bound
+        if literal != None and indexes != None:
+            self.add(literal, indexes)
+
+    ''' Add an AP to the tracker, map it to given set of indexes.  '''
+    def add(self, literal, indexes):
+        mask = 0
+        for t in indexes:
+            mask |= 1 << t
+        lid = literal_id(literal)
+        self.literals[lid] = self.literals.get(lid, 0) | mask
+
+    ''' Calculate the union of this tracker and another. '''
+    def union(self, other):
+        new = DepTracker(time_bound=self.time_bound)
+        if other == None:
+            return new
+        new.literals = dict(self.literals)
+        for k, v in other.literals.items():
+            new.literals[k] = new.literals.get(k, 0) | v
+        return new
+
+    ''' Determine whether the intersection of tracked literals between this
+        tracker and another is empty. Return true iff emtpy. '''
+    def isdisjoint(self, other):
+        return self.literals.keys().isdisjoint(other.literals.keys())
+
+    ''' Determine whether this tracker and another track no common variable,
+        i.e., no literal at the same time index. Return true iff so. '''
+    def vardisjoint(self, other):
+        if len(self.literals) > len(other.literals):
+            return other.vardisjoint(self)
+        for k, v in self.literals.items():
+            if v & other.literals.get(k, 0):
+                return False
+        return True
+
+    ''' Produce a tracker of the variables tracked by both this tracker and
+        another. '''
+    def intersection(self, other):
+        new = DepTracker(time_bound=self.time_bound)
+        for k, v in self.literals.items():
+            v &= other.literals.get(k, 0)
+            if v:
+                new.literals[k] = v
+        return new
+
+    ''' Return the tracked variables as (literal, time) pairs, with each time
+        index increased by n; those beyond the time bound are left out. '''
+    def variables(self, n=0):
+        found = []
+        for k, v in self.literals.items():
+            for t in range(v.bit_length()):
+                if v >> t & 1 and t+n <= self.time_bound:
+                    found.append((_LITERAL_NAMES[k], t+n))
+        return sorted(found, key=lambda var: (var[1], var[0]))
+
+    ''' Count the number of tracked variables. '''
+    def count(self):
+        cnt = 0
+        for v in self.literals.values():
+            cnt += bin(v).count('1')
+        return cnt
+
+    ''' Test whether each literal is tracked for at most one time index. '''
+    def timeindependent(self):
+        for v in self.literals.values():
+            if v & (v-1):
+                return False
+        return True
+
+    ''' Produce a shifted version of this tracker; time index of each tracked
+        literal is increased by n. '''
+    def shifted(self, n):
+        new = DepTracker(time_bound=self.time_bound)
+        window = (1 << (self.time_bound+1)) - 1
+        for k, v in self.literals.items():
+            v = (v << n) & window
+            if v:
+                new.literals[k] = v
+        return new
+
+    ''' Produce a saturated version of this tracker; each literal will be tracked
+        from its smallest time index up to the given time bound (default=N). '''
+    def saturated(self, time_bound=None):
+        new = DepTracker(time_bound=self.time_bound)
+        if time_bound == None:
+            time_bound = self.time_bound
+        window = (1 << (time_bound+1)) - 1
+        for k, v in self.literals.items():
+            ''' All bits from the lowest set one upwards. '''
+            new.literals[k] = window & -(v & -v)
+        return new
+
+''' Traversal function that reduces implications, double implications.
+    Until, WeakUntil and Release are kept; they are measured directly. '''
+def simplify(f):
+
+    if isinstance(f, BinaryFormula):
+        l = f.left_formula
+        r = f.right_formula
+
+        if isinstance(f, Implication):
+            if (l == FalseFormula or r == TrueFormula):
+                return TrueFormula()
+            if (l == TrueFormula):
+                return r
+            if (r == FalseFormula):
+                return Negation(l)
+            else:
+                return Disjunction(Negation(l),r)
+
+        if isinstance(f, DoubleImplication):
+            return Disjunction(Conjunction(l, r), Conjunction(Negation(l), Negation(r)))
+            # ((l and r) or (not l and not r))
+            # FIXME: add reductions here
+
+    return f
+
+''' Recursively apply given function to each node in the AST. '''
+def traverse(form, func):
+
+    if isinstance(form, BinaryFormula):
+        form.left_formula = traverse(form.left_formula, func)
+        form.right_formula = traverse(form.right_formula, func)
+    elif isinstance(form, UnaryFormula):
+        form.right_formula = traverse(form.right_formula, func)
+
+    return func(form)
+
+''' Return the operands of the given AST node. '''
+def children(form):
+    if isinstance(form, BinaryFormula):
+        return (form.left_formula, form.right_formula)
+    if isinstance(form, UnaryFormula):
+        return (form.right_formula,)
+    return ()
+
+''' Convert a Boolean expression string to CNF. Return 0 or 1 if the
+    expression is constant, and a (nvars, dimacs) pair otherwise. '''
+def encode(formula):
+    cnf = expr(formula).to_cnf()
+    ''' False '''
+    if str(cnf) == "0":
+        return 0
+    ''' True '''
+    if str(cnf) == "1":
+        return 1
+    litmap, nvars, clauses = cnf.encode_cnf()
+    LOG.debug("vars: " + str(nvars))
+    LOG.debug("clauses: " + (str(len(clauses))))
+    return nvars, str(DimacsCNF(nvars, clauses))
+
+''' Parse an LTL expression written with the PyEDA symbol set. '''
+def parse(text):
+    with _PARSE_LOCK:
+        return LTL_PARSER.parse(text, symbol_set_cls=source)
+
+''' Return the structural key assigned to a prepared node by
+    Measurer.compute_deps. '''
+def structural_key(f):
+    return f.info['key']
+
+''' Measures LTL formulas under a fixed time bound. Each instance owns its
+    model count cache, so instances can be used side by side (e.g. for
+    different time bounds) without interfering. '''
+class Measurer(object):
+
+    ''' Constructor. If bypass_count is false, every Conjunction, Disjunction
+        and temporal operator is measured by model counting, even if its
+        operands are independent. If workers is given, the model counts
+        needed for a measurement are first collected and then computed by a
+        pool of that many workers; executor selects a 'process' or 'thread'
+        pool. The counter computes the number of models of a DIMACS CNF (see
+        spec_space.counting); by default, small CNFs are counted in-process
+        and others by sharpSAT. If a CountCache is given as count_cache,
+        model counts are looked up in and added to it, so they persist
+        across runs. The encoder selects how subformulas are turned
+        into CNF: 'tseitin' encodes the formula tree directly, 'pyeda'
+        expands it into a string and lets pyeda convert that to CNF. With
+        'bdd', models are counted on a BDD of the unrolled formula instead,
+        unless the BDD exceeds bdd_limit nodes; then, the 'tseitin' CNF is
+        counted.
+        The numeric representation of measures is 'float', 'exact' for
+        exact dyadic rationals, or 'log' for log-space probabilities that
+        neither underflow nor saturate at large time bounds (see
+        spec_space.numeric). If the operands of a Conjunction or Disjunction
+        share at most condition_limit (literal, time) variables, it is
+        measured by conditioning on these instead of by model counting.
+        If the counter fails (e.g. by exceeding its time or memory budget),
+        on_failure decides what happens: 'raise' raises the CountingError;
+        'bounds' continues with the count unknown, so its measure becomes the
+        Interval from 0 to 1 and the result is an Interval as well; a
+        ModelCounter is asked for the count instead. If that counter gives
+        bounds on its counts (such as spec_space.approx.ApproxCounter), the
+        measure becomes an Interval with these bounds and its estimate.
+        Expansions over at most truth_table_limit (literal, time) variables
+        are counted in-process on bit-parallel truth tables, whatever the
+        encoder; 0 disables this.
+        With engine 'automaton', formulas are not unrolled at all: each
+        formula is measured on a Markov chain over the values of its temporal
+        subformulas (see spec_space.automaton), whose cost grows only
+        linearly or logarithmically with the time bound. The counting
+        options then do not apply. '''
+    def __init__(self, time_bound, bypass_count=True, memoize=True,
+            workers=None, executor='process', counter=None, count_cache=None,
+            encoder='tseitin', numeric='float', condition_limit=3,
+            bdd_limit=100000, on_failure='raise', truth_table_limit=20,
+            engine='unroll'):
+        if time_bound == None or int(time_bound) < 0:
+            raise ValueError("time bound must be a non-negative integer")
+        self.N = int(time_bound)
+        self.bypass_count = bypass_count
+        self.memoize = memoize
+        if counter == None:
+            counter = SelectingCounter()
+        self.counter = counter
+        self.count_cache = count_cache
+        if encoder not in ('tseitin', 'pyeda', 'bdd'):
+            raise ValueError("encoder must be 'tseitin', 'pyeda' or 'bdd'")
+        self.encoder = encoder
+        if numeric not in NUMERICS:
+            raise ValueError("numeric must be one of " + ", ".join(NUMERICS))
+        self.numeric = numeric
+        self.condition_limit = condition_limit
+        if on_failure not in ('raise', 'bounds') \
+                and not hasattr(on_failure, 'count'):
+            raise ValueError("on_failure must be 'raise', 'bounds' or a counter")
+        self.on_failure = on_failure
+        self._inexact = set()
+        self._approximate = {}
+        self._unknown = set()
+        self.half = ratio(1, 1, numeric)
+        self.unroller = Unroller(self.N, key=structural_key)
+        self.tseitin = TseitinEncoder(self.N, self.unroller)
+        if engine not in ('unroll', 'automaton'):
+            raise ValueError("engine must be 'unroll' or 'automaton'")
+        self.automaton = None
+        if engine == 'automaton':
+            self.automaton = AutomatonEngine(numeric)
+        self.truth_table = None
+        if truth_table_limit:
+            self.truth_table = TruthTableCounter(self.unroller.dag,
+                    truth_table_limit)
+        self.bdd = None
+        if encoder == 'bdd':
+            self.bdd = BDDCounter(self.unroller.dag, bdd_limit)
+        self.cache = {}
+        self.expression_cache = {}
+        self.memo = {}
+        self.expansions = {}
+        self._keys = {}
+        if executor not in ('process', 'thread'):
+            raise ValueError("executor must be 'process' or 'thread'")
+        self.workers = workers
+        self.executor = executor
+        self._pool = None
+        self._jobs = None
+        self._prefetched = {}
+
+    ''' Return a simplified formula with dependencies computed, ready to be
+        measured. Strings are parsed first. Formulas prepared by this
+        measurer before, and their subformulas, are returned as they are;
+        to edit them, use replace, which keeps them prepared. '''
+    def prepare(self, formula):
+        if isinstance(formula, LTLFormula) and formula.info.get('measurer') is self:
+            return formula
+        if not isinstance(formula, LTLFormula):
+            formula = parse(formula)
+            if formula == None:
+                raise ValueError("No expression")
+        formula = traverse(formula, simplify)
+        formula = traverse(formula, self.compute_deps)
+        self._link(formula)
+        return formula
+
+    ''' Replace the subformula node of the prepared formula by replacement
+        (a string or an LTLFormula), in place, and return the formula, which
+        stays prepared. Only the replacement is prepared from scratch; the
+        dependencies and keys of the nodes above node are recomputed, and
+        all others are kept. Since measures are memoized by the structure of
+        subformulas, measuring the edited formula then only measures the
+        nodes on the paths from the replacement up to the root. If node is
+        the formula itself, the prepared replacement is returned. '''
+    def replace(self, formula, node, replacement):
+        formula = self.prepare(formula)
+        new = self.prepare(replacement)
+        if node is formula:
+            return new
+        if not self._contains(formula, node):
+            raise ValueError("node is not a subformula of the formula")
+        parents = node.info['parents']
+        for parent in parents:
+            if isinstance(parent, BinaryFormula) and parent.left_formula is node:
+                parent.left_formula = new
+            if parent.right_formula is node:
+                parent.right_formula = new
+        new.info['parents'] = parents
+        node.info['parents'] = []
+
+        ''' Recompute the ancestors, each after all of its operands. '''
+        order = []
+        seen = set()
+        def visit(f):
+            if id(f) in seen:
+                return
+            seen.add(id(f))
+            for parent in f.info['parents']:
+                visit(parent)
+            order.append(f)
+        for parent in parents:
+            visit(parent)
+        for f in reversed(order):
+            self.compute_deps(f)
+        return formula
+
+    ''' Return whether node is a subformula of the prepared formula, by
+        following the parent links of node up to it. '''
+    def _contains(self, formula, node):
+        if node.info.get('measurer') is not self:
+            return False
+        seen = set()
+        stack = [node]
+        while stack:
+            f = stack.pop()
+            if f is formula:
+                return True
+            if id(f) not in seen:
+                seen.add(id(f))
+                stack.extend(f.info['parents'])
+        return False
+
+    ''' Record in info['parents'] the nodes of the given formula that have
+        each node as an operand, and mark them all as prepared by this
+        measurer. Simplification may share a subformula between several
+        parents. '''
+    def _link(self, formula):
+        nodes = []
+        seen = set()
+        stack = [formula]
+        while stack:
+            f = stack.pop()
+            if id(f) in seen:
+                continue
+            seen.add(id(f))
+            nodes.append(f)
+            stack.extend(children(f))
+        for f in nodes:
+            f.info['parents'] = []
+            f.info['measurer'] = self
+        for f in nodes:
+            for child in children(f):
+                child.info['parents'].append(f)
+
+    ''' Measure the given formula (a string or an LTLFormula). '''
+    def measure(self, formula):
+        f = self.prepare(formula)
+        return self._evaluate(lambda: self._measure(f))
+
+    ''' Measure a sequence of formulas (strings or LTLFormulas) and yield
+        their measures in order, as each becomes available. Identical
+        formulas are parsed and measured once; subformula measures and model
+        counts are shared across the whole batch. '''
+    def measure_batch(self, formulas):
+        done = {}
+        for formula in formulas:
+            if isinstance(formula, LTLFormula):
+                yield self.measure(formula)
+            elif formula in done:
+                yield done[formula]
+            else:
+                done[formula] = self.measure(formula)
+                yield done[formula]
+
+    ''' Compute the distance between two formulas, i.e., the measure of
+        their symmetric difference. '''
+    def distance(self, formula1, formula2):
+        e1 = self.prepare(formula1)
+        e2 = self.prepare(formula2)
+        return self._evaluate(lambda: self._distance(e1, e2))
+
+    ''' Compute the matrix of pairwise distances between the given formulas
+        as a NumPy array. Each formula is prepared once, and only the upper
+        triangle is computed; the measures and expansions of the individual
+        formulas are reused across all pairs they participate in. '''
+    def distance_matrix(self, formulas):
+        prepared = [self.prepare(f) for f in formulas]
+
+        def fill():
+            zero = ratio(0, 0, self.numeric)
+            matrix = [[zero] * len(prepared) for _ in prepared]
+            for i in range(len(prepared)):
+                for j in range(i+1, len(prepared)):
+                    d = self._distance(prepared[i], prepared[j])
+                    matrix[i][j] = d
+                    matrix[j][i] = d
+            return self._array(matrix)
+
+        return self._evaluate(fill)
+
+    ''' Measure the given formula under each of the given time bounds, none
+        of which may exceed this measurer's, and return the measures as a
+        NumPy array. Measuring at time offset N-b under time bound N is the
+        same as measuring under time bound b, so the formula is prepared
+        once and all bounds share subformula measures, model counts, and the
+        running products of the temporal operators. '''
+    def measure_sweep(self, formula, bounds):
+        bounds = [int(b) for b in bounds]
+        for b in bounds:
+            if b < 0 or b > self.N:
+                raise ValueError("time bounds must be between 0 and %d" % self.N)
+        f = self.prepare(formula)
+
+        def sweep():
+            ''' Largest bound first, so that its recursion fills the rest. '''
+            measures = {}
+            for b in sorted(set(bounds), reverse=True):
+                measures[b] = self._measure(f, self.N - b)
+            return self._array([measures[b] for b in bounds])
+
+        return self._evaluate(sweep)
+
+    ''' Return the given (nested) list of measures as a NumPy array: of
+        floats if all measures are floats, and of objects otherwise (exact
+        or log-space measures, or Intervals). '''
+    def _array(self, measures):
+        if self.numeric == 'float':
+            try:
+                return np.array(measures, dtype=float)
+            except TypeError:
+                pass
+        return np.array(measures, dtype=object)
+
+    ''' Run the given computation. Without workers, this simply calls it.
+        With workers, the computation is first run in a collection pass that
+        records every expansion it would count (returning a placeholder
+        measure), the expansions are then encoded and counted by the worker
+        pool, and finally the computation is run again, now finding all
+        counts readily available. '''
+    def _evaluate(self, computation):
+        if not self.workers:
+            return computation()
+
+        memo = self.memo
+        self.memo = {}
+        self._jobs = {}
+        try:
+            computation()
+            jobs = self._jobs
+        finally:
+            self.memo = memo
+            self._jobs = None
+
+        if jobs:
+            self._count_parallel(jobs)
+        try:
+            return computation()
+        finally:
+            self._prefetched = {}
+
+    ''' Return the worker pool, starting it on first use. The pool is kept
+        for the lifetime of the measurer, until close is called. '''
+    def _worker_pool(self):
+        if self._pool == None:
+            if self.executor == 'process':
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    ''' Shut down the worker pool, if it was started. The measurer can
+        still be used afterwards; a new pool is started when needed. '''
+    def close(self):
+        if self._pool != None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    ''' Count the given jobs using the worker pool. Jobs map cache keys to
+        encodings; expansions that still need encoding map to None and are
+        encoded by the pool as well. '''
+    def _count_parallel(self, jobs):
+        pool = self._worker_pool()
+        pending = [key for key, enc in jobs.items() if enc == None]
+        encodings = dict((key, enc) for key, enc in jobs.items() if enc != None)
+        encodings.update(zip(pending, pool.map(encode, pending)))
+        ''' Counts that failed or were approximated before are not tried
+            again, as in _count_expansion. '''
+        todo = set()
+        for enc in encodings.values():
+            if enc in (0, 1):
+                continue
+            dimacs = enc[1]
+            if dimacs in self._unknown or dimacs in self._approximate:
+                continue
+            if self._lookup(dimacs) == None:
+                todo.add(dimacs)
+        dimacs_list = list(todo)
+        concurrent = getattr(self.counter, 'concurrent', False)
+        if self.on_failure == 'raise':
+            if concurrent:
+                counts = self.counter.count_many(dimacs_list)
+            else:
+                counts = pool.map(self.counter.count, dimacs_list)
+        elif concurrent:
+            ''' The counter distributes the work itself, and reports the
+                counts that fail without giving up on the others. '''
+            counts = self.counter.try_count_many(dimacs_list)
+        else:
+            counts = pool.map(try_count, [self.counter] * len(dimacs_list),
+                    dimacs_list)
+        for dimacs, count in zip(dimacs_list, counts):
+            if count == None:
+                self._count(dimacs, failed=True)
+            else:
+                self._store(dimacs, count)
+
+        for formula, enc in encodings.items():
+            self._prefetched[formula] = self._count_expansion(formula, enc)
+
+    ''' Compute the distance between two prepared formulas. Only the nodes
+        that make up the symmetric difference are prepared; the operands
+        keep their dependencies and keys. '''
+    def _distance(self, e1, e2):
+        if self.bypass_count and e1.info['deps'].isdisjoint(e2.info['deps']):
+            m1 = self._measure(e1)
+            m2 = self._measure(e2)
+            return m1 * (1-m2) + (1-m1) * m2
+
+        left = Conjunction(e1, self.compute_deps(Negation(e2)))
+        right = Conjunction(self.compute_deps(Negation(e1)), e2)
+        diff = Disjunction(self.compute_deps(left), self.compute_deps(right))
+        return self._measure(self.compute_deps(diff))
+
+    ''' Expand a given LTL formula into a Boolean expression, observing the
+        time bound. Returns a string representation of the expansion, which
+        is rendered from the shared unrolling DAG. If fixed is given, the
+        variables it assigns are replaced by their values. '''
+    def expand(self, f, n=0, fixed=None):
+        root = self._root(f, n, fixed)
+        if root not in self.expansions:
+            self.expansions[root] = self.unroller.dag.to_expression(root)
+        return self.expansions[root]
+
+    ''' Return the DAG node of the unrolling of f at time offset n, with
+        the variables assigned by fixed replaced by their values. '''
+    def _root(self, f, n, fixed=None):
+        root = self.unroller.unroll(f, n)
+        if fixed:
+            root = self.unroller.dag.restrict(root, dict(fixed))
+        return root
+
+    ''' Measure a formula node at time offset n by model counting, using the
+        configured encoder, conditioned on the assignment fixed, if any. '''
+    def _sat_node(self, f, n, fixed=None):
+        if self.truth_table != None:
+            counted = self.truth_table.count(self._root(f, n, fixed))
+            if counted != None:
+                count, nvars = counted
+                return ratio(count, nvars, self.numeric)
+
+        if self.encoder == 'pyeda':
+            return self.sat_measure(self.expand(f, n, fixed))
+
+        if self.bdd != None:
+            try:
+                count, nvars = self.bdd.count(self._root(f, n, fixed))
+                return ratio(count, nvars, self.numeric)
+            except BDDLimitError:
+                LOG.debug("BDD node limit reached; counting the CNF instead")
+
+        key = "tseitin:%d:%d:%s" % (self.N, n,
+                f.generate(with_base_names=True, ignore_precedence=True))
+        if fixed:
+            key += ":" + ",".join(("%s_%d" if value else "~%s_%d") % var
+                    for var, value in fixed)
+        return self._sat(key, lambda: self._encode_node(f, n, fixed))
+
+    ''' Encode a formula node at time offset n with the Tseitin encoder. '''
+    def _encode_node(self, f, n, fixed=None):
+        cnf = self.tseitin.encode_node(self._root(f, n, fixed))
+        if cnf is True or cnf is False:
+            return int(cnf)
+        return cnf.nprimary, cnf.dimacs()
+
+    ''' Pass the given Boolean formula to the model counter.
+        Return the number of satisfying models devided by 2**nvars. '''
+    def sat_measure(self, formula):
+        return self._sat(formula)
+
+    ''' Return the measure of the expansion identified by key, encoding it
+        with the given function (or pyeda, if none is given) when needed.
+        Measures are cached in two layers: first by the key itself, so that a
+        hit avoids CNF conversion altogether, then by the CNF. '''
+    def _sat(self, key, encoder=None):
+        if key in self._prefetched:
+            return self._prefetched[key]
+        if self.memoize:
+            if key in self.expression_cache:
+                return self.expression_cache[key]
+            if self.count_cache != None:
+                stored = self.count_cache.get_expression(key)
+                if stored != None:
+                    count, nvars = stored
+                    self.expression_cache[key] = ratio(count, nvars, self.numeric)
+                    return self.expression_cache[key]
+        if self._jobs is not None:
+            ''' Collection pass; count later. '''
+            self._jobs[key] = encoder() if encoder != None else None
+            return self.half
+
+        if encoder == None:
+            return self._count_expansion(key, encode(key))
+        return self._count_expansion(key, encoder())
+
+    ''' Count the models of an expansion, given its encoding, and record the
+        result in both cache layers. '''
+    def _count_expansion(self, formula, enc):
+        if enc in (0, 1):
+            count, nvars = enc, 0
+        else:
+            nvars, dimacs = enc
+            if dimacs not in self._unknown and dimacs not in self._approximate:
+                count = self._lookup(dimacs)
+                if count == None:
+                    count = self._count(dimacs)
+            if dimacs in self._approximate:
+                estimate, lower, upper = self._approximate[dimacs]
+                return Interval(ratio(lower, nvars, self.numeric),
+                        ratio(upper, nvars, self.numeric),
+                        ratio(estimate, nvars, self.numeric))
+            if dimacs in self._unknown:
+                return Interval(0, 1)
+            if dimacs in self._inexact:
+                ''' Do not persist counts from the fallback counter. '''
+                return ratio(count, nvars, self.numeric)
+
+        if self.count_cache != None:
+            self.count_cache.put_expression(formula, count, nvars)
+        self.expression_cache[formula] = ratio(count, nvars, self.numeric)
+        return self.expression_cache[formula]
+
+    ''' Count the models of a DIMACS CNF and cache the count. If the counter
+        fails (or failed already, if failed is true), apply the on_failure
+        policy: return the count of the fallback counter, which is only kept
+        in memory, or None if the count remains unknown or is approximated
+        with bounds. '''
+    def _count(self, dimacs, failed=False):
+        if not failed:
+            try:
+                count = self.counter.count(dimacs)
+                self._store(dimacs, count)
+                return count
+            except CountingError as e:
+                if self.on_failure == 'raise':
+                    raise
+                LOG.warning("model counting failed: %s" % e)
+
+        if self.on_failure != 'bounds':
+            try:
+                if hasattr(self.on_failure, 'count_bounds'):
+                    self._approximate[dimacs] = self.on_failure.count_bounds(dimacs)
+                    return None
+                count = self.on_failure.count(dimacs)
+                self.cache[dimacs] = count
+                self._inexact.add(dimacs)
+                return count
+            except CountingError as e:
+                LOG.warning("fallback model counting failed: %s" % e)
+        self._unknown.add(dimacs)
+        return None
+
+    ''' Look up the model count of a CNF in the in-memory cache, and then in
+        the persistent cache, if any. '''
+    def _lookup(self, dimacs):
+        if not self.memoize:
+            return None
+        if dimacs in self.cache:
+            return self.cache[dimacs]
+        if self.count_cache == None:
+            return None
+        count = self.count_cache.get(dimacs)
+        if count != None:
+            self.cache[dimacs] = count
+        return count
+
+    ''' Add a model count to the in-memory and persistent caches. '''
+    def _store(self, dimacs, count):
+        self.cache[dimacs] = count
+        if self.count_cache != None:
+            self.count_cache.put(dimacs, count)
+
+    ''' Traversal function that computes AST nodes' dependencies.
+        Updates the info['deps'] field for all nodes, and the
+        info['lrdisjoint'] for bifurcating nodes. The operands of the node
+        must be up to date; what was derived from their previous state is
+        dropped. '''
+    def compute_deps(self, f):
+        N = self.N
+        f.info.pop('components', None)
+
+        if isinstance(f, Literal):
+            name = f.generate(with_base_names=True)
+            f.info['deps'] = DepTracker(name, set([0]), time_bound=N)
+        elif isinstance(f, TrueFormula) or isinstance(f, FalseFormula):
+            f.info['deps'] = DepTracker(time_bound=N)
+        elif isinstance(f, BinaryFormula):
+            if isinstance(f, Until):
+                ldeps = f.left_formula.info['deps'].saturated(max(N-1, 0))
+                rdeps = f.right_formula.info['deps'].saturated(N)
+            elif isinstance(f, WeakUntil) or isinstance(f, Release):
+                ldeps = f.left_formula.info['deps'].saturated(N)
+                rdeps = f.right_formula.info['deps'].saturated(N)
+            elif isinstance(f, Conjunction) or isinstance(f, Disjunction):
+                ldeps = f.left_formula.info['deps']
+                rdeps = f.right_formula.info['deps']
+            else:
+                raise Exception("Unsupported AST node: " + type(f).__name__)
+            f.info['deps'] = ldeps.union(rdeps)
+            f.info['lrdisjoint'] = ldeps.isdisjoint(rdeps)
+        else:
+            if isinstance(f, Globally) or isinstance(f, Eventually):
+                f.info['deps'] = f.right_formula.info['deps'].saturated()
+            elif isinstance(f, Next) or isinstance(f, VarNext): # check whether X could be parameterized
+                f.info['deps'] = f.right_formula.info['deps'].shifted(1)
+            elif isinstance(f, Negation):
+                f.info['deps'] = f.right_formula.info['deps']
+            else:
+                raise Exception("Unsupported AST node: " + type(f).__name__)
+
+        f.info['key'] = self._intern(f)
+        return f
+
+    ''' Return a small integer identifying the structure of the given node.
+        Structurally equal subformulas get the same key, which is used to
+        share measures between them. Children must have been interned. '''
+    def _intern(self, f):
+        if isinstance(f, Literal):
+            struct = (f.Symbol, f.generate(with_base_names=True))
+        elif isinstance(f, BinaryFormula):
+            struct = (f.Symbol, f.left_formula.info['key'],
+                    f.right_formula.info['key'])
+        elif isinstance(f, UnaryFormula):
+            struct = (f.Symbol, f.right_formula.info['key'])
+        else:
+            struct = (f.Symbol,)
+        return self._keys.setdefault(struct, len(self._keys))
+
+    ''' Measure a prepared formula at time offset n, reusing the measure of
+        structurally equal subformulas seen before. If fixed is given, the
+        measure is conditioned on the values it assigns to (literal, time)
+        variables; it is given as a sorted tuple of ((literal, time), value)
+        pairs, and only the variables the formula depends on at offset n are
+        taken into account. '''
+    def _measure(self, f, n=0, fixed=None):
+        if fixed:
+            fixed = self._relevant(f, n, fixed)
+        if not self.memoize:
+            return self._measure_node(f, n, fixed)
+        if fixed:
+            key = (f.info['key'], n, fixed)
+        else:
+            key = (f.info['key'], n)
+        if key not in self.memo:
+            self.memo[key] = self._measure_node(f, n, fixed)
+        return self.memo[key]
+
+    ''' Return the part of the assignment fixed that concerns variables the
+        given formula may depend on at time offset n, or None if empty. '''
+    def _relevant(self, f, n, fixed):
+        deps = f.info['deps'].literals
+        kept = tuple(((name, t), value) for (name, t), value in fixed
+                if t >= n and deps.get(literal_id(name), 0) >> (t-n) & 1)
+        return kept or None
+
+    ''' Measure a prepared formula at time offset n. '''
+    def _measure_node(self, f, n, fixed=None):
+        N = self.N
+
+        if self.automaton != None:
+            ''' Measuring at offset n is measuring under bound N-n. '''
+            return self.automaton.measure(f, N - n)
+
+        if isinstance(f, TrueFormula):
+            return 1
+
+        if isinstance(f, FalseFormula):
+            return 0
+
+        if isinstance(f, Literal):
+            if fixed:
+                ''' Only the variable of this literal at n is relevant. '''
+                return 1 if fixed[0][1] else 0
+            if (n <= N):
+                return self.half
+            else:
+                return 0
+
+        if isinstance(f, Negation):
+            return 1 - self._measure(f.right_formula, n, fixed)
+
+        if isinstance(f, Conjunction):
+            if f.info['lrdisjoint'] and self.bypass_count:
+                return self._measure(f.right_formula, n, fixed) * self._measure(f.left_formula, n, fixed)
+            else:
+                return self._measure_chain(f, n, fixed)
+
+        if isinstance(f, Disjunction):
+            if f.info['lrdisjoint'] and self.bypass_count:
+                return 1 - (1-self._measure(f.right_formula, n, fixed)) * (1-self._measure(f.left_formula, n, fixed))
+            else:
+                return self._measure_chain(f, n, fixed)
+
+        if isinstance(f, Next) or isinstance(f, VarNext):
+            return self._measure(f.right_formula, n+1, fixed)
+
+        if isinstance(f, Until) or isinstance(f, WeakUntil) \
+                or isinstance(f, Release):
+            if f.info['lrdisjoint'] \
+                    and f.left_formula.info['deps'].timeindependent() \
+                    and f.right_formula.info['deps'].timeindependent() \
+                    and self.bypass_count:
+                return self._measure_window(f, n, fixed)
+            else:
+                return self._sat_node(f, n, fixed)
+
+        if isinstance(f, Globally) or isinstance(f, Eventually):
+            deps = f.right_formula.info['deps']
+            if deps.timeindependent() and self.bypass_count:
+                return self._measure_window(f, n, fixed)
+            else:
+                return self._sat_node(f, n, fixed)
+
+        raise Exception("Unsupported AST node: " + type(f).__name__)
+
+    ''' Measure a Conjunction or Disjunction whose operands share literals
+        at time offset n. The chain of Conjunctions (or Disjunctions) rooted
+        at f is split into groups of operands that share no variables; each
+        group is measured on its own, and the results are combined as
+        independent events. Only a group with several operands needs model
+        counting. '''
+    def _measure_chain(self, f, n, fixed=None):
+        if not self.bypass_count:
+            return self._sat_node(f, n, fixed)
+
+        if 'components' not in f.info:
+            f.info['components'] = self._components(f)
+        parts = f.info['components']
+        if len(parts) == 1:
+            return self._measure_conditioned(f, n, fixed)
+
+        m = 1
+        for part in parts:
+            if isinstance(f, Conjunction):
+                m *= self._measure(part, n, fixed)
+            else:
+                m *= 1 - self._measure(part, n, fixed)
+        if isinstance(f, Conjunction):
+            return m
+        return 1-m
+
+    ''' Measure a Conjunction or Disjunction at time offset n by conditioning
+        on the (literal, time) variables its operands share (Shannon
+        expansion). Given values for these, the operands are independent, so
+        the measure is the average, over all assignments to the shared
+        variables, of the combined conditional measures of the operands.
+        This is done only if at most condition_limit variables are shared;
+        otherwise, f is measured by model counting. '''
+    def _measure_conditioned(self, f, n, fixed=None):
+        left = f.left_formula
+        right = f.right_formula
+        assigned = dict(fixed or ())
+        shared = [v for v in left.info['deps'].intersection(
+                right.info['deps']).variables(n) if v not in assigned]
+        if len(shared) > self.condition_limit:
+            return self._sat_node(f, n, fixed)
+
+        m = 0
+        weight = ratio(1, len(shared), self.numeric)
+        for values in product((False, True), repeat=len(shared)):
+            cond = tuple(sorted(tuple(fixed or ()) + tuple(zip(shared, values))))
+            m1 = self._measure(left, n, cond)
+            m2 = self._measure(right, n, cond)
+            if isinstance(f, Conjunction):
+                m = m + weight * (m1 * m2)
+            else:
+                m = m + weight * (1 - (1-m1) * (1-m2))
+        return m
+
+    ''' Flatten the chain of Conjunctions or Disjunctions rooted at f, and
+        partition its operands into the connected components of their
+        variable-sharing graph. Return one prepared formula per component:
+        the operand itself, or the chain of its operands. If there is a
+        single component, f itself is returned. '''
+    def _components(self, f):
+        operands = []
+        stack = [f]
+        while stack:
+            g = stack.pop()
+            if type(g) is type(f):
+                stack.append(g.right_formula)
+                stack.append(g.left_formula)
+            else:
+                operands.append(g)
+
+        parent = list(range(len(operands)))
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i in range(len(operands)):
+            for j in range(i):
+                if find(i) != find(j) and not \
+                        operands[i].info['deps'].vardisjoint(operands[j].info['deps']):
+                    parent[find(i)] = find(j)
+
+        groups = {}
+        for i, g in enumerate(operands):
+            groups.setdefault(find(i), []).append(g)
+        if len(groups) == 1:
+            return [f]
+
+        parts = []
+        for group in groups.values():
+            part = group[0]
+            for g in group[1:]:
+                part = self.compute_deps(type(f)(part, g))
+            parts.append(part)
+        LOG.debug("split %d operands into %d components" % (len(operands), len(parts)))
+        return parts
+
+    ''' Measure a Globally, Eventually, Until, WeakUntil or Release at time
+        offset n by backward recursion over the time steps of its window.
+        This requires the operand measures at all steps to be mutually
+        independent: the operands share no literals, and each uses each of
+        its literals at a single time index only. With m_i the measure of
+        the body of G f or F f at step i,
+            (G f)_i = m_i * (G f)_i+1,
+            (F f)_i = 1 - (1 - m_i) * (1 - (F f)_i+1),
+        where G f is 1 and F f is 0 beyond the bound. For f U g, with a_i and
+        b_i the measures of f and g at step i,
+            (f U g)_i = b_i + (1 - b_i) * a_i * (f U g)_i+1,
+        where (f U g) is 0 beyond the bound; f W g has the same recursion
+        but is 1 beyond the bound, and
+            (f R g)_i = b_i * (a_i + (1 - a_i) * (f R g)_i+1),
+        also 1 beyond the bound. The recursion resumes from the earliest
+        later offset already measured, and memoizes the offsets it passes,
+        so that measuring a node at consecutive offsets (as a sweep over
+        time bounds does) costs one step per offset. '''
+    def _measure_window(self, f, n, fixed=None):
+        N = self.N
+        key = f.info['key']
+
+        i = n+1
+        if self.memoize and not fixed:
+            while i <= N and (key, i) not in self.memo:
+                i += 1
+        else:
+            i = N+1
+        if i <= N:
+            acc = self.memo[(key, i)]
+        elif isinstance(f, Eventually) or isinstance(f, Until):
+            acc = 0
+        else:
+            acc = 1
+
+        for j in range(min(i-1, N), n-1, -1):
+            if isinstance(f, Globally):
+                acc = self._measure(f.right_formula, j, fixed) * acc
+            elif isinstance(f, Eventually):
+                acc = 1 - (1-self._measure(f.right_formula, j, fixed)) * (1-acc)
+            else:
+                first = self._measure(f.left_formula, j, fixed)
+                then = self._measure(f.right_formula, j, fixed)
+                if isinstance(f, Release):
+                    acc = then * (1 - (1-first) * (1-acc))
+                else:
+                    acc = 1 - (1-then) * (1 - first*acc)
+            if j > n and self.memoize and not fixed:
+                self.memo[(key, j)] = acc
+        return acc
+
+''' Count the models of a DIMACS CNF with the given counter. Return None if
+    the counter fails. '''
+def try_count(counter, dimacs):
+    try:
+        return counter.count(dimacs)
+    except CountingError as e:
+        LOG.warning("model counting failed: %s" % e)
+        return None
+
+''' Read formulas from a file, one per line. Blank lines and lines starting
+    with '#' are skipped. '''
+def read_formulas(path):
+    formulas = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                formulas.append(line)
+    return formulas
+
+''' Compute the matrix of pairwise distances between the given formulas
+    under the given time bound. Options are passed on to the Measurer. '''
+def distance_matrix(formulas, time_bound, **options):
+    with Measurer(time_bound, **options) as measurer:
+        return measurer.distance_matrix(formulas)
+
+''' Measure the given formula under each of the given time bounds and
+    return the measures as a NumPy array. Options are passed on to the
+    Measurer. '''
+def measure_sweep(formula, bounds, **options):
+    bounds = list(bounds)
+    with Measurer(max(bounds), **options) as measurer:
+        return measurer.measure_sweep(formula, bounds)
+
+''' Print a help message and exit. '''
+def help_exit():
+    print("Usage: python measure.py [OPTIONS] [TIME_BOUND] LTL_EXPR1 [LTL_EXPR2]")
+    print("       python measure.py [OPTIONS] -b [TIME_BOUND] FILE")
+    print("       python measure.py [OPTIONS] -m [TIME_BOUND] FILE [OUTPUT.npy]")
+    print("       python measure.py [OPTIONS] -s [TIME_BOUND] LTL_EXPR")
+    print("Options: -d              always count models")
+    print("         -x              compute exact (rational) measures")
+    print("         -l              compute measures in log space")
+    print("         -u              measure on automata instead of unrolling, for")
+    print("                         large time bounds")
+    print("         -j WORKERS      count models using a pool of WORKERS processes")
+    print("         -w HELPERS      count models using HELPERS persistent helper processes")
+    print("         -c CACHE_FILE   keep model counts in a persistent cache")
+    print("         -t SECONDS      give up on model counts after SECONDS, and report")
+    print("                         bounds on the measure instead")
+    print("         -a              with -t, estimate the counts given up on, within a")
+    print("                         factor 1.8 with probability 0.8, also giving up")
+    print("                         after SECONDS")
+    exit(1)
+
+''' Command line entry point. Measures LTL_EXPR1, or, if LTL_EXPR2 is given,
+    the distance between the two expressions. With -b, measures each formula
+    in FILE and prints one measure per line. With -m, computes the distance
+    matrix of the formulas in FILE and saves it to OUTPUT.npy, or prints it
+    if no output file is given. With -s, measures LTL_EXPR under every
+    time bound from 0 up to TIME_BOUND and prints one bound and measure per
+    line. With -j, model counts are computed by a pool of WORKERS processes;
+    with -w, by HELPERS persistent helper processes, which are started once;
+    with -c, model counts are kept in CACHE_FILE; with -t, model counts that
+    take longer than SECONDS are given up, and the measures that depend on
+    them are reported as intervals; with -a as well, these counts are
+    estimated approximately, within SECONDS as well, and the intervals are
+    those of the estimates, around the estimated measure; with -x, measures
+    are exact rationals; with -l, they are computed in log space; with -u,
+    formulas are measured on automata instead of being unrolled. '''
+def main(args=None):
+    if args == None:
+        args = argv
+
+    bypass_count = True
+    batch = False
+    matrix = False
+    sweep = False
+    workers = None
+    helpers = None
+    timeout = None
+    approximate = False
+    count_cache = None
+    numeric = 'float'
+    engine = 'unroll'
+    offset = 0
+    while len(args) > offset+1 and args[offset+1] in ("-d", "-b", "-m", "-s", "-j", "-w", "-c", "-t", "-a", "-x", "-l", "-u"):
+        if args[offset+1] == "-d":
+            bypass_count = False
+        elif args[offset+1] == "-x":
+            numeric = 'exact'
+        elif args[offset+1] == "-l":
+            numeric = 'log'
+        elif args[offset+1] == "-a":
+            approximate = True
+        elif args[offset+1] == "-u":
+            engine = 'automaton'
+        elif args[offset+1] == "-b":
+            batch = True
+        elif args[offset+1] == "-m":
+            matrix = True
+        elif args[offset+1] == "-s":
+            sweep = True
+        else:
+            if len(args) < offset+3:
+                help_exit()
+            if args[offset+1] == "-j":
+                workers = int(args[offset+2])
+            elif args[offset+1] == "-w":
+                helpers = int(args[offset+2])
+            elif args[offset+1] == "-t":
+                timeout = float(args[offset+2])
+            else:
+                count_cache = CountCache(args[offset+2])
+            offset += 1
+        offset += 1
+
+    if len(args) < offset+3:
+        help_exit()
+
+    counter = None
+    if helpers:
+        counter = WorkerPool(helpers, timeout=timeout)
+        if not workers:
+            workers = helpers
+    elif timeout != None:
+        counter = SelectingCounter(small=DPLLCounter(timeout),
+                large=SharpSAT(timeout=timeout))
+
+    on_failure = 'raise'
+    if timeout != None:
+        on_failure = ApproxCounter(timeout=timeout) if approximate else 'bounds'
+
+    measurer = Measurer(int(args[offset+1]), bypass_count=bypass_count,
+            workers=workers, count_cache=count_cache, numeric=numeric,
+            counter=counter, on_failure=on_failure, engine=engine)
+
+    ''' Stop the worker pool and the helper processes, and write back the
+        count cache, if any, also on early returns. '''
+    try:
+        if batch:
+            for m in measurer.measure_batch(read_formulas(args[offset+2])):
+                print(m, flush=True)
+            return
+
+        if matrix:
+            distances = measurer.distance_matrix(read_formulas(args[offset+2]))
+            if len(args) > offset+3:
+                np.save(args[offset+3], distances)
+            elif distances.dtype == object:
+                ''' Print exact and log-space measures as such, not their
+                    representations. '''
+                print(np.array2string(distances, formatter={'all': str}))
+            else:
+                print(distances)
+            return
+
+        if sweep:
+            bounds = range(measurer.N + 1)
+            for b, m in zip(bounds, measurer.measure_sweep(args[offset+2], bounds)):
+                print(b, m, flush=True)
+            return
+
+        expr1 = parse(args[offset+2])
+        expr2 = None
+        if len(args) > offset+3:
+            expr2 = parse(args[offset+3])
+
+        if expr1 == None:
+            print("No expression")
+            help_exit()
+
+        if (expr2 == None):
+            print(measurer.measure(expr1))
+        else:
+            print(measurer.distance(expr1, expr2))
+    finally:
+        measurer.close()
+        if hasattr(counter, 'close'):
+            counter.close()
+        if count_cache != None:
+            count_cache.close()
@@ -0,0 +1,365 @@
+'''
+This module contains the number representations used for measures.
+
+Every measure computed by the measure engine is a dyadic rational: literals
+measure 1/2, model counts are divided by a power of two, and measures are
+only combined by products and complements. Dyadic represents such numbers
+exactly as a numerator and the base-2 logarithm of the denominator, so that
+arithmetic stays in integer multiplications and shifts.
+
+For large time bounds, products over many steps underflow (or their
+complements saturate) in double precision. LogProbability keeps both the
+logarithm of a probability and that of its complement, so that products
+and complements remain accurate at any magnitude.
+
+If a model count cannot be computed, its measure is only known to lie in an
+Interval, which propagates through the computation as bounds on the result.
+'''
+
+import math
+import numbers
+from fractions import Fraction
+
+''' Supported number representations '''
+NUMERICS = ('float', 'exact', 'log')
+
+
+class Dyadic(object):
+    '''
+    Exact number num / 2**exp. Instances are normalized: num is odd, or num
+    is zero and exp is zero.
+    '''
+
+    __slots__ = ('num', 'exp')
+
+    def __init__(self, num, exp=0):
+        '''
+        :param num: numerator
+        :type num: int
+        :param exp: base-2 logarithm of the denominator; may be negative
+        :type exp: int
+        '''
+        if num == 0:
+            exp = 0
+        else:
+            zeros = (num & -num).bit_length() - 1
+            num >>= zeros
+            exp -= zeros
+        if exp < 0:
+            num <<= -exp
+            exp = 0
+        self.num = num
+        self.exp = exp
+
+    @staticmethod
+    def coerce(other):
+        '''
+        Returns other as a Dyadic, or None if it is not an int or Dyadic.
+        '''
+        if isinstance(other, Dyadic):
+            return other
+        if isinstance(other, int):
+            return Dyadic(other)
+        return None
+
+    @property
+    def numerator(self):
+        return self.num
+
+    @property
+    def denominator(self):
+        return 1 << self.exp
+
+    def fraction(self):
+        '''
+        Returns this number as a Fraction.
+        '''
+        return Fraction(self.num, 1 << self.exp)
+
+    def __add__(self, other):
+        other = Dyadic.coerce(other)
+        if other is None:
+            return NotImplemented
+        if self.exp >= other.exp:
+            return Dyadic(self.num + (other.num << (self.exp - other.exp)), self.exp)
+        return Dyadic((self.num << (other.exp - self.exp)) + other.num, other.exp)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Dyadic(-self.num, self.exp)
+
+    def __sub__(self, other):
+        other = Dyadic.coerce(other)
+        if other is None:
+            return NotImplemented
+        return self + (-other)
+
+    def __rsub__(self, other):
+        other = Dyadic.coerce(other)
+        if other is None:
+            return NotImplemented
+        return other + (-self)
+
+    def __mul__(self, other):
+        other = Dyadic.coerce(other)
+        if other is None:
+            return NotImplemented
+        return Dyadic(self.num * other.num, self.exp + other.exp)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return self.fraction() / other
+
+    def __rtruediv__(self, other):
+        return other / self.fraction()
+
+    def __abs__(self):
+        return Dyadic(abs(self.num), self.exp)
+
+    def __float__(self):
+        return self.num / (1 << self.exp)
+
+    def __eq__(self, other):
+        if isinstance(other, (Dyadic, int)):
+            other = Dyadic.coerce(other)
+            return self.num == other.num and self.exp == other.exp
+        return self.fraction() == other
+
+    def __lt__(self, other):
+        return self.fraction() < other
+
+    def __le__(self, other):
+        return self.fraction() <= other
+
+    def __gt__(self, other):
+        return self.fraction() > other
+
+    def __ge__(self, other):
+        return self.fraction() >= other
+
+    def __hash__(self):
+        return hash(self.fraction())
+
+    def __repr__(self):
+        return 'Dyadic(%d, %d)' % (self.num, self.exp)
+
+    def __str__(self):
+        return str(self.fraction())
+
+
+numbers.Rational.register(Dyadic)
+
+
+def logaddexp(a, b):
+    '''
+    Returns log(exp(a) + exp(b)).
+    '''
+    if a < b:
+        a, b = b, a
+    if b == -math.inf:
+        return a
+    return a + math.log1p(math.exp(b - a))
+
+
+def logsubexp(a, b):
+    '''
+    Returns log(exp(a) - exp(b)), for b <= a.
+    '''
+    if b == -math.inf:
+        return a
+    if b >= a:
+        return -math.inf
+    return a + math.log1p(-math.exp(b - a))
+
+
+class LogProbability(object):
+    '''
+    Probability p represented by the pair (log p, log (1 - p)). Complements
+    swap the pair; products and sums update both logarithms with stable
+    log-add and log-subtract operations, so that neither p nor 1 - p
+    underflows.
+    '''
+
+    __slots__ = ('lp', 'lq')
+
+    def __init__(self, lp, lq):
+        '''
+        :param lp: natural logarithm of the probability
+        :type lp: float
+        :param lq: natural logarithm of its complement
+        :type lq: float
+        '''
+        self.lp = lp
+        self.lq = lq
+
+    @staticmethod
+    def coerce(other):
+        '''
+        Returns other as a LogProbability, or None if it is not one, nor 0
+        or 1.
+        '''
+        if isinstance(other, LogProbability):
+            return other
+        if other == 0:
+            return LogProbability(-math.inf, 0.0)
+        if other == 1:
+            return LogProbability(0.0, -math.inf)
+        return None
+
+    @staticmethod
+    def ratio(count, nvars):
+        '''
+        Returns count / 2**nvars.
+        '''
+        total = 1 << nvars
+        lp = math.log(count) if count > 0 else -math.inf
+        lq = math.log(total - count) if count < total else -math.inf
+        return LogProbability(lp - nvars * math.log(2), lq - nvars * math.log(2))
+
+    def __mul__(self, other):
+        other = LogProbability.coerce(other)
+        if other is None:
+            return NotImplemented
+        ''' 1 - pq = (1 - p) + p(1 - q) '''
+        return LogProbability(self.lp + other.lp,
+                logaddexp(self.lq, self.lp + other.lq))
+
+    __rmul__ = __mul__
+
+    def __add__(self, other):
+        ''' Sum of the probabilities of two disjoint events. '''
+        other = LogProbability.coerce(other)
+        if other is None:
+            return NotImplemented
+        ''' 1 - (p + q) = (1 - p) - q '''
+        return LogProbability(logaddexp(self.lp, other.lp),
+                logsubexp(self.lq, other.lp))
+
+    __radd__ = __add__
+
+    def __rsub__(self, other):
+        if other != 1:
+            return NotImplemented
+        return LogProbability(self.lq, self.lp)
+
+    def __float__(self):
+        return math.exp(self.lp)
+
+    def __eq__(self, other):
+        other = LogProbability.coerce(other)
+        if other is None:
+            return NotImplemented
+        return self.lp == other.lp and self.lq == other.lq
+
+    def __lt__(self, other):
+        return float(self) < float(other)
+
+    def __gt__(self, other):
+        return float(self) > float(other)
+
+    def __hash__(self):
+        return hash((self.lp, self.lq))
+
+    def __repr__(self):
+        return 'LogProbability(%r, %r)' % (self.lp, self.lq)
+
+    def __str__(self):
+        ''' Print whichever of p and 1 - p is represented more accurately. '''
+        if self.lp <= self.lq:
+            if math.exp(self.lp) == 0.0 and self.lp != -math.inf:
+                return 'exp(%r)' % self.lp
+        elif self.lq != -math.inf and math.exp(self.lq) < 1e-15:
+            return '1 - exp(%r)' % self.lq
+        return str(float(self))
+
+
+class Interval(object):
+    '''
+    A measure that is only known to lie between lower and upper, possibly
+    with an estimate of its value. Measures are combined by products,
+    complements and sums of non-negative terms, which are monotone in each
+    operand, so combining the bounds of the operands yields bounds of the
+    result. Estimates are combined likewise, as long as all operands have
+    one.
+    '''
+
+    __slots__ = ('lower', 'upper', 'estimate')
+
+    def __init__(self, lower, upper, estimate=None):
+        '''
+        :param lower: lower bound, in any number representation
+        :param upper: upper bound, in the same representation
+        :param estimate: estimate, in the same representation, or None
+        '''
+        self.lower = lower
+        self.upper = upper
+        self.estimate = estimate
+
+    @staticmethod
+    def coerce(other):
+        '''
+        Returns other as an Interval; numbers become point intervals.
+        '''
+        if isinstance(other, Interval):
+            return other
+        return Interval(other, other, other)
+
+    @staticmethod
+    def __combine(op, x, y):
+        if x is None or y is None:
+            return None
+        return op(x, y)
+
+    def __mul__(self, other):
+        other = Interval.coerce(other)
+        return Interval(self.lower * other.lower, self.upper * other.upper,
+                Interval.__combine(lambda x, y: x * y, self.estimate, other.estimate))
+
+    __rmul__ = __mul__
+
+    def __add__(self, other):
+        other = Interval.coerce(other)
+        return Interval(self.lower + other.lower, self.upper + other.upper,
+                Interval.__combine(lambda x, y: x + y, self.estimate, other.estimate))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other = Interval.coerce(other)
+        return Interval(self.lower - other.upper, self.upper - other.lower,
+                Interval.__combine(lambda x, y: x - y, self.estimate, other.estimate))
+
+    def __rsub__(self, other):
+        return Interval.coerce(other) - self
+
+    def __eq__(self, other):
+        if not isinstance(other, Interval):
+            return NotImplemented
+        return self.lower == other.lower and self.upper == other.upper \
+                and self.estimate == other.estimate
+
+    def __hash__(self):
+        return hash((self.lower, self.upper, self.estimate))
+
+    def __repr__(self):
+        return 'Interval(%r, %r, %r)' % (self.lower, self.upper, self.estimate)
+
+    def __str__(self):
+        if self.estimate is None:
+            return '[%s, %s]' % (self.lower, self.upper)
+        return '%s [%s, %s]' % (self.estimate, self.lower, self.upper)
+
+
+def ratio(count, nvars, numeric='float'):
+    '''
+    Returns count / 2**nvars in the given number representation.
+    '''
+    if numeric == 'float':
+        return count / 2**nvars
+    if numeric == 'exact':
+        return Dyadic(count, nvars)
+    if numeric == 'log':
+        return LogProbability.ratio(count, nvars)
+    raise ValueError('unknown numeric representation: %s' % numeric)
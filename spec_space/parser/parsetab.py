@@ -0,0 +1,61 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'rightIMPLICATIONleftDOUBLE_IMPLICATIONleftORleftANDleftGEGEQLELEQEQUALITYleftUNTILRELEASEWEAK_UNTILrightGLOBALLYEVENTUALLYleftADDSUBleftMULDIVrightNOTNEXTCONSTANTADD AND CONSTANT DIV DOUBLE_IMPLICATION EQUALITY EVENTUALLY FALSE GE GEQ GLOBALLY IMPLICATION LE LEQ LITERAL LPAREN MUL NEXT NOT OR RELEASE RPAREN SUB TRUE UNTIL VAR_NEXT WEAK_UNTILexpr : expr AND exprexpr : expr OR exprexpr : NOT exprexpr : expr IMPLICATION exprexpr : expr DOUBLE_IMPLICATION exprexpr : expr EQUALITY exprexpr : GLOBALLY exprexpr : EVENTUALLY exprexpr : NEXT exprexpr : NEXT CONSTANT expr %prec CONSTANTexpr : expr UNTIL exprexpr : expr RELEASE exprexpr : expr WEAK_UNTIL exprexpr : propprop : TRUEprop : FALSEexpr : LPAREN expr RPARENprop : LPAREN prop RPARENprop : prop GE propprop : prop GEQ propprop : prop LE propprop : prop LEQ propprop : prop ADD propprop : prop SUB propprop : prop MUL propprop : prop DIV propprop : unaryunary : CONSTANTunary : SUB CONSTANTunary : LITERALunary : SUB LITERAL'
+    
+_lr_action_items = {'NOT':([0,2,3,4,5,8,14,15,16,17,18,19,20,21,26,],[2,2,2,2,2,2,2,2,2,2,2,2,2,2,2,]),'GLOBALLY':([0,2,3,4,5,8,14,15,16,17,18,19,20,21,26,],[3,3,3,3,3,3,3,3,3,3,3,3,3,3,3,]),'EVENTUALLY':([0,2,3,4,5,8,14,15,16,17,18,19,20,21,26,],[4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,]),'NEXT':([0,2,3,4,5,8,14,15,16,17,18,19,20,21,26,],[5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,]),'LPAREN':([0,2,3,4,5,8,14,15,16,17,18,19,20,21,26,27,28,29,30,31,32,33,34,49,],[8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,49,49,49,49,49,49,49,49,49,]),'TRUE':([0,2,3,4,5,8,14,15,16,17,18,19,20,21,26,27,28,29,30,31,32,33,34,49,],[9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,]),'FALSE':([0,2,3,4,5,8,14,15,16,17,18,19,20,21,26,27,28,29,30,31,32,33,34,49,],[10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,]),'CONSTANT':([0,2,3,4,5,8,11,14,15,16,17,18,19,20,21,26,27,28,29,30,31,32,33,34,49,],[6,6,6,6,26,6,37,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,]),'SUB':([0,2,3,4,5,6,7,8,9,10,12,13,14,15,16,17,18,19,20,21,26,27,28,29,30,31,32,33,34,36,37,38,48,49,50,51,52,53,54,55,56,58,59,],[11,11,11,11,11,-28,32,11,-15,-16,-27,-30,11,11,11,11,11,11,11,11,-28,11,11,11,11,11,11,11,11,32,-29,-31,32,11,32,32,32,-23,-24,-25,-26,-18,32,]),'LITERAL':([0,2,3,4,5,8,11,14,15,16,17,18,19,20,21,26,27,28,29,30,31,32,33,34,49,],[13,13,13,13,13,13,38,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,]),'$end':([1,6,7,9,10,12,13,22,23,24,25,26,37,38,39,40,41,42,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,],[0,-28,-14,-15,-16,-27,-30,-3,-7,-8,-9,-28,-29,-31,-1,-2,-4,-5,-6,-11,-12,-13,-10,-19,-20,-21,-22,-23,-24,-25,-26,-17,-18,]),'AND':([1,6,7,9,10,12,13,22,23,24,25,26,35,36,37,38,39,40,41,42,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,],[14,-28,-14,-15,-16,-27,-30,-3,-7,-8,-9,-28,14,-14,-29,-31,-1,14,14,14,-6,-11,-12,-13,-10,-19,-20,-21,-22,-23,-24,-25,-26,-17,-18,]),'OR':([1,6,7,9,10,12,13,22,23,24,25,26,35,36,37,38,39,40,41,42,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,],[15,-28,-14,-15,-16,-27,-30,-3,-7,-8,-9,-28,15,-14,-29,-31,-1,-2,15,15,-6,-11,-12,-13,-10,-19,-20,-21,-22,-23,-24,-25,-26,-17,-18,]),'IMPLICATION':([1,6,7,9,10,12,13,22,23,24,25,26,35,36,37,38,39,40,41,42,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,],[16,-28,-14,-15,-16,-27,-30,-3,-7,-8,-9,-28,16,-14,-29,-31,-1,-2,16,-5,-6,-11,-12,-13,-10,-19,-20,-21,-22,-23,-24,-25,-26,-17,-18,]),'DOUBLE_IMPLICATION':([1,6,7,9,10,12,13,22,23,24,25,26,35,36,37,38,39,40,41,42,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,],[17,-28,-14,-15,-16,-27,-30,-3,-7,-8,-9,-28,17,-14,-29,-31,-1,-2,17,-5,-6,-11,-12,-13,-10,-19,-20,-21,-22,-23,-24,-25,-26,-17,-18,]),'EQUALITY':([1,6,7,9,10,12,13,22,23,24,25,26,35,36,37,38,39,40,41,42,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,],[18,-28,-14,-15,-16,-27,-30,-3,-7,-8,-9,-28,18,-14,-29,-31,18,18,18,18,-6,-11,-12,-13,-10,-19,-20,-21,-22,-23,-24,-25,-26,-17,-18,]),'UNTIL':([1,6,7,9,10,12,13,22,23,24,25,26,35,36,37,38,39,40,41,42,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,],[19,-28,-14,-15,-16,-27,-30,-3,-7,-8,-9,-28,19,-14,-29,-31,19,19,19,19,19,-11,-12,-13,-10,-19,-20,-21,-22,-23,-24,-25,-26,-17,-18,]),'RELEASE':([1,6,7,9,10,12,13,22,23,24,25,26,35,36,37,38,39,40,41,42,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,],[20,-28,-14,-15,-16,-27,-30,-3,-7,-8,-9,-28,20,-14,-29,-31,20,20,20,20,20,-11,-12,-13,-10,-19,-20,-21,-22,-23,-24,-25,-26,-17,-18,]),'WEAK_UNTIL':([1,6,7,9,10,12,13,22,23,24,25,26,35,36,37,38,39,40,41,42,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,],[21,-28,-14,-15,-16,-27,-30,-3,-7,-8,-9,-28,21,-14,-29,-31,21,21,21,21,21,-11,-12,-13,-10,-19,-20,-21,-22,-23,-24,-25,-26,-17,-18,]),'GE':([6,7,9,10,12,13,26,36,37,38,48,50,51,52,53,54,55,56,58,59,],[-28,27,-15,-16,-27,-30,-28,27,-29,-31,-19,-20,-21,-22,-23,-24,-25,-26,-18,27,]),'GEQ':([6,7,9,10,12,13,26,36,37,38,48,50,51,52,53,54,55,56,58,59,],[-28,28,-15,-16,-27,-30,-28,28,-29,-31,-19,-20,-21,-22,-23,-24,-25,-26,-18,28,]),'LE':([6,7,9,10,12,13,26,36,37,38,48,50,51,52,53,54,55,56,58,59,],[-28,29,-15,-16,-27,-30,-28,29,-29,-31,-19,-20,-21,-22,-23,-24,-25,-26,-18,29,]),'LEQ':([6,7,9,10,12,13,26,36,37,38,48,50,51,52,53,54,55,56,58,59,],[-28,30,-15,-16,-27,-30,-28,30,-29,-31,-19,-20,-21,-22,-23,-24,-25,-26,-18,30,]),'ADD':([6,7,9,10,12,13,26,36,37,38,48,50,51,52,53,54,55,56,58,59,],[-28,31,-15,-16,-27,-30,-28,31,-29,-31,31,31,31,31,-23,-24,-25,-26,-18,31,]),'MUL':([6,7,9,10,12,13,26,36,37,38,48,50,51,52,53,54,55,56,58,59,],[-28,33,-15,-16,-27,-30,-28,33,-29,-31,33,33,33,33,33,33,-25,-26,-18,33,]),'DIV':([6,7,9,10,12,13,26,36,37,38,48,50,51,52,53,54,55,56,58,59,],[-28,34,-15,-16,-27,-30,-28,34,-29,-31,34,34,34,34,34,34,-25,-26,-18,34,]),'RPAREN':([6,7,9,10,12,13,22,23,24,25,26,35,36,37,38,39,40,41,42,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,59,],[-28,-14,-15,-16,-27,-30,-3,-7,-8,-9,-28,57,58,-29,-31,-1,-2,-4,-5,-6,-11,-12,-13,-10,-19,-20,-21,-22,-23,-24,-25,-26,-17,-18,58,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'expr':([0,2,3,4,5,8,14,15,16,17,18,19,20,21,26,],[1,22,23,24,25,35,39,40,41,42,43,44,45,46,47,]),'prop':([0,2,3,4,5,8,14,15,16,17,18,19,20,21,26,27,28,29,30,31,32,33,34,49,],[7,7,7,7,7,36,7,7,7,7,7,7,7,7,7,48,50,51,52,53,54,55,56,59,]),'unary':([0,2,3,4,5,8,14,15,16,17,18,19,20,21,26,27,28,29,30,31,32,33,34,49,],[12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> expr","S'",1,None,None,None),
+  ('expr -> expr AND expr','expr',3,'p_expr_and','parser.py',29),
+  ('expr -> expr OR expr','expr',3,'p_expr_or','parser.py',33),
+  ('expr -> NOT expr','expr',2,'p_expr_not','parser.py',38),
+  ('expr -> expr IMPLICATION expr','expr',3,'p_expr_implies','parser.py',42),
+  ('expr -> expr DOUBLE_IMPLICATION expr','expr',3,'p_expr_iff','parser.py',46),
+  ('expr -> expr EQUALITY expr','expr',3,'p_expr_equals','parser.py',50),
+  ('expr -> GLOBALLY expr','expr',2,'p_expr_globally','parser.py',58),
+  ('expr -> EVENTUALLY expr','expr',2,'p_expr_eventually','parser.py',64),
+  ('expr -> NEXT expr','expr',2,'p_expr_next','parser.py',68),
+  ('expr -> NEXT CONSTANT expr','expr',3,'p_expr_multinext','parser.py',77),
+  ('expr -> expr UNTIL expr','expr',3,'p_expr_until','parser.py',93),
+  ('expr -> expr RELEASE expr','expr',3,'p_expr_release','parser.py',97),
+  ('expr -> expr WEAK_UNTIL expr','expr',3,'p_expr_weak_until','parser.py',101),
+  ('expr -> prop','expr',1,'p_expr_prop','parser.py',105),
+  ('prop -> TRUE','prop',1,'p_prop_true','parser.py',109),
+  ('prop -> FALSE','prop',1,'p_prop_false','parser.py',113),
+  ('expr -> LPAREN expr RPAREN','expr',3,'p_expr_parenthesis','parser.py',117),
+  ('prop -> LPAREN prop RPAREN','prop',3,'p_prop_parenthesis','parser.py',121),
+  ('prop -> prop GE prop','prop',3,'p_prop_ge','parser.py',125),
+  ('prop -> prop GEQ prop','prop',3,'p_prop_geq','parser.py',129),
+  ('prop -> prop LE prop','prop',3,'p_prop_le','parser.py',135),
+  ('prop -> prop LEQ prop','prop',3,'p_prop_leq','parser.py',139),
+  ('prop -> prop ADD prop','prop',3,'p_prop_add','parser.py',143),
+  ('prop -> prop SUB prop','prop',3,'p_prop_sub','parser.py',147),
+  ('prop -> prop MUL prop','prop',3,'p_prop_mul','parser.py',153),
+  ('prop -> prop DIV prop','prop',3,'p_prop_div','parser.py',157),
+  ('prop -> unary','prop',1,'p_prop_unary','parser.py',161),
+  ('unary -> CONSTANT','unary',1,'p_unary_pos','parser.py',165),
+  ('unary -> SUB CONSTANT','unary',2,'p_unary_neg','parser.py',175),
+  ('unary -> LITERAL','unary',1,'p_unary_literal','parser.py',185),
+  ('unary -> SUB LITERAL','unary',2,'p_unary_neg_literal','parser.py',191),
+]
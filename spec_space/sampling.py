@@ -0,0 +1,238 @@
+'''
+This module contains a Monte Carlo estimator of the measure of LTL
+formulas.
+
+The measure of a formula under time bound N is the probability that a
+uniformly random trace of length N+1 over its literals satisfies it, so it
+can be estimated by sampling traces. Traces are drawn as a NumPy boolean
+array of shape (samples, N+1, literals), and the formula is evaluated on all
+of them at once: every subformula yields a (samples, N+1) array of its
+values at each time index, computed from those of its operands with array
+operations. Beyond the bound, every subformula has a constant value (false
+for literals, eventually and until; true for globally, weak until and
+release), which Next shifts in.
+
+The estimator is much cheaper than exact measurement for large formulas and
+time bounds, and its confidence intervals serve as a cross-check of the
+exact engine.
+'''
+
+import math
+
+import numpy as np
+
+from spec_space.formula import LTLFormula, TrueFormula, FalseFormula, \
+        Literal, Negation, Conjunction, Disjunction, Next, VarNext, Globally, \
+        Eventually, Until, WeakUntil, Release, BinaryFormula, UnaryFormula
+from spec_space.measure import parse, simplify, traverse
+from spec_space.numeric import Interval
+
+''' Maximal number of trace bits drawn at once '''
+BATCH_BITS = 1 << 24
+
+
+class TraceSampler(object):
+    '''
+    Estimates measures by evaluating formulas on uniformly random traces.
+    '''
+
+    def __init__(self, time_bound, samples=100000, confidence=0.95, seed=None):
+        '''
+        :param time_bound: last time index of the traces
+        :type time_bound: int
+        :param samples: number of traces per estimate
+        :type samples: int
+        :param confidence: probability that the confidence interval of an
+            estimate contains the measure
+        :type confidence: float
+        :param seed: seed of the random traces
+        '''
+        if time_bound is None or int(time_bound) < 0:
+            raise ValueError('time bound must be a non-negative integer')
+        if samples < 1:
+            raise ValueError('samples must be positive')
+        if not 0 < confidence < 1:
+            raise ValueError('confidence must be in (0, 1)')
+        self.N = int(time_bound)
+        self.samples = samples
+        self.confidence = confidence
+        self.z = normal_quantile((1 + confidence) / 2)
+        self.random = np.random.default_rng(seed)
+
+    def estimate(self, formula):
+        '''
+        Returns the estimated measure of the given formula (a string or an
+        LTLFormula) as an Interval: the Wilson score interval of the
+        fraction of satisfying traces, with that fraction as its estimate.
+        '''
+        if not isinstance(formula, LTLFormula):
+            formula = parse(formula)
+            if formula is None:
+                raise ValueError('No expression')
+        formula = traverse(formula, simplify)
+        literals = sorted(set(literal_names(formula)))
+
+        width = (self.N + 1) * max(len(literals), 1)
+        step = max(1, BATCH_BITS // width)
+        hits = 0
+        for start in range(0, self.samples, step):
+            size = min(step, self.samples - start)
+            traces = self.random.integers(0, 2, (size, self.N + 1,
+                    len(literals)), dtype=np.bool_)
+            values, _ = evaluate(formula, traces, literals)
+            hits += int(np.count_nonzero(values[:, 0]))
+        return wilson(hits, self.samples, self.z)
+
+
+def literal_names(f):
+    '''
+    Yields the names of the literals occurring in the given formula.
+    '''
+    if isinstance(f, Literal):
+        yield f.generate(with_base_names=True)
+    elif isinstance(f, BinaryFormula):
+        yield from literal_names(f.left_formula)
+        yield from literal_names(f.right_formula)
+    elif isinstance(f, UnaryFormula):
+        yield from literal_names(f.right_formula)
+
+
+def evaluate(f, traces, literals, memo=None):
+    '''
+    Returns the values of the given formula on the given traces, as a
+    (values, tail) pair: values is a boolean array of shape (samples, N+1)
+    holding the value at each time index, and tail is the value beyond the
+    bound. The formula must have been simplified to literals, constants,
+    negation, conjunction, disjunction, next, globally, eventually, until,
+    weak until and release.
+
+    :param traces: boolean array of shape (samples, N+1, literals)
+    :type traces: numpy.ndarray
+    :param literals: names of the literals, in the order of the last axis
+        of traces
+    :type literals: list
+    '''
+    if memo is None:
+        memo = {}
+    key = id(f)
+    if key not in memo:
+        ''' Keep f alive so that its id is not reused. '''
+        memo[key] = (evaluate_node(f, traces, literals, memo), f)
+    return memo[key][0]
+
+
+def evaluate_node(f, traces, literals, memo):
+    shape = traces.shape[:2]
+
+    if isinstance(f, TrueFormula):
+        return np.ones(shape, dtype=np.bool_), True
+
+    if isinstance(f, FalseFormula):
+        return np.zeros(shape, dtype=np.bool_), False
+
+    if isinstance(f, Literal):
+        index = literals.index(f.generate(with_base_names=True))
+        return traces[:, :, index], False
+
+    if isinstance(f, Negation):
+        values, tail = evaluate(f.right_formula, traces, literals, memo)
+        return ~values, not tail
+
+    if isinstance(f, Conjunction) or isinstance(f, Disjunction):
+        left, left_tail = evaluate(f.left_formula, traces, literals, memo)
+        right, right_tail = evaluate(f.right_formula, traces, literals, memo)
+        if isinstance(f, Conjunction):
+            return left & right, left_tail and right_tail
+        return left | right, left_tail or right_tail
+
+    if isinstance(f, Next) or isinstance(f, VarNext):
+        values, tail = evaluate(f.right_formula, traces, literals, memo)
+        shifted = np.empty_like(values)
+        shifted[:, :-1] = values[:, 1:]
+        shifted[:, -1] = tail
+        return shifted, tail
+
+    if isinstance(f, Globally) or isinstance(f, Eventually):
+        ''' Accumulate from the bound backwards. '''
+        values, _ = evaluate(f.right_formula, traces, literals, memo)
+        if isinstance(f, Globally):
+            op, tail = np.logical_and, True
+        else:
+            op, tail = np.logical_or, False
+        return op.accumulate(values[:, ::-1], axis=1)[:, ::-1], tail
+
+    if isinstance(f, Until) or isinstance(f, WeakUntil) \
+            or isinstance(f, Release):
+        ''' f U g holds at i iff g holds at i, or f holds at i and f U g
+            holds at i+1; it does not hold beyond the bound. f W g is the
+            same, except that it holds beyond the bound. f R g holds at i
+            iff g holds at i, and f holds at i or f R g holds at i+1; it
+            holds beyond the bound. '''
+        left, _ = evaluate(f.left_formula, traces, literals, memo)
+        right, _ = evaluate(f.right_formula, traces, literals, memo)
+        tail = not isinstance(f, Until)
+        values = np.empty_like(left)
+        later = np.full(shape[0], tail)
+        for i in range(shape[1] - 1, -1, -1):
+            if isinstance(f, Release):
+                later = right[:, i] & (left[:, i] | later)
+            else:
+                later = right[:, i] | (left[:, i] & later)
+            values[:, i] = later
+        return values, tail
+
+    raise Exception("Unsupported AST node: " + type(f).__name__)
+
+
+def wilson(hits, samples, z):
+    '''
+    Returns the Wilson score interval of hits successes in samples trials,
+    for the given standard normal quantile, with the fraction of successes
+    as its estimate.
+    '''
+    p = hits / samples
+    denominator = 1 + z * z / samples
+    center = (p + z * z / (2 * samples)) / denominator
+    spread = z * math.sqrt(p * (1 - p) / samples
+            + z * z / (4 * samples * samples)) / denominator
+    return Interval(max(0.0, center - spread), min(1.0, center + spread), p)
+
+
+def normal_quantile(p):
+    '''
+    Returns the p-quantile of the standard normal distribution.
+    '''
+    low, high = -40.0, 40.0
+    for _ in range(100):
+        middle = (low + high) / 2
+        if (1 + math.erf(middle / math.sqrt(2))) / 2 < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def cross_check(formula, measurer, sampler=None):
+    '''
+    Measures the given formula exactly with the given Measurer and
+    estimates it with a TraceSampler for the same time bound. Returns the
+    exact measure, the estimate, and whether the exact measure lies in the
+    confidence interval of the estimate (if the exact measure is an
+    Interval itself, whether the two intervals overlap).
+
+    :param measurer: exact measurer
+    :type measurer: Measurer
+    :param sampler: estimator; a default TraceSampler for the time bound of
+        the measurer if None
+    :type sampler: TraceSampler
+    '''
+    if sampler is None:
+        sampler = TraceSampler(measurer.N)
+    if sampler.N != measurer.N:
+        raise ValueError('time bounds differ')
+    exact = measurer.measure(formula)
+    estimate = sampler.estimate(formula)
+    bounds = Interval.coerce(exact)
+    inside = float(bounds.lower) <= estimate.upper \
+            and estimate.lower <= float(bounds.upper)
+    return exact, estimate, inside
@@ -0,0 +1,113 @@
+'''
+This module contains a model counter that enumerates all assignments at
+once with bit-parallel truth tables.
+
+A formula over k variables is evaluated on all 2**k assignments in a single
+pass over the unrolling DAG: every node becomes a 2**k-bit integer whose
+bit j is the value of the node under assignment j, and negation,
+conjunction and disjunction become bitwise operations on these integers.
+The number of models is the number of set bits of the root. Each variable
+added doubles the size of the tables, so this only pays off for small
+formulas; for those, it avoids encoding a CNF and running a counter at all.
+'''
+
+from spec_space.unroll import FALSE as DAG_FALSE, TRUE as DAG_TRUE
+
+
+class TruthTableCounter(object):
+    '''
+    Counts the models of nodes of a BooleanDAG that depend on at most
+    max_vars variables, by evaluating them on truth tables. Counts are kept
+    per node.
+    '''
+
+    def __init__(self, dag, max_vars=20):
+        '''
+        :param dag: DAG whose nodes are counted
+        :type dag: BooleanDAG
+        :param max_vars: maximal number of variables of a counted node
+        :type max_vars: int
+        '''
+        self.dag = dag
+        self.max_vars = max_vars
+        self.counts = {}
+
+    def count(self, root):
+        '''
+        Returns a (count, nvars) pair for the given DAG node: the number of
+        models over, and the number of, the variables it depends on; or None
+        if it depends on more than max_vars variables.
+        '''
+        if root not in self.counts:
+            variables = self.dag.variables(root)
+            if len(variables) > self.max_vars:
+                return None
+            table = self.table(root, variables)
+            self.counts[root] = (bin(table).count('1'), len(variables))
+        return self.counts[root]
+
+    def table(self, root, variables):
+        '''
+        Returns the truth table of the given DAG node over the given
+        variables, which must include all variables that it depends on:
+        bit j is the value of the node when variable i is true iff bit i of
+        j is set.
+        '''
+        size = 1 << len(variables)
+        full = (1 << size) - 1
+        index = dict((v, i) for i, v in enumerate(variables))
+
+        ''' Release the table of a node as soon as its last parent has been
+            evaluated, so that at most a frontier of tables is held. '''
+        order = self.dag.reachable(root)
+        parents = dict.fromkeys(order, 0)
+        for x in order:
+            for y in self.__children(x):
+                parents[y] += 1
+
+        tables = {}
+        for x in order:
+            op, args = self.dag.nodes[x]
+            if x == DAG_FALSE:
+                t = 0
+            elif x == DAG_TRUE:
+                t = full
+            elif op == 'var':
+                t = variable_table(index[args], size)
+            elif op == 'not':
+                t = full ^ tables[args]
+            elif op == 'and':
+                t = full
+                for y in args:
+                    t &= tables[y]
+            else:
+                t = 0
+                for y in args:
+                    t |= tables[y]
+            tables[x] = t
+            for y in self.__children(x):
+                parents[y] -= 1
+                if parents[y] == 0:
+                    del tables[y]
+        return tables[root]
+
+    def __children(self, x):
+        op, args = self.dag.nodes[x]
+        if op == 'not':
+            return (args,)
+        if op == 'and' or op == 'or':
+            return args
+        return ()
+
+
+def variable_table(i, size):
+    '''
+    Returns the truth table of variable i over size assignments: the
+    integer whose bit j is set iff bit i of j is set.
+    '''
+    period = 2 << i
+    table = ((1 << (1 << i)) - 1) << (1 << i)
+    while period < size:
+        table |= table << period
+        period <<= 1
+    return table
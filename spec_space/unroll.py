@@ -0,0 +1,294 @@
+'''
+This module contains the unrolling of bounded LTL formulas into Boolean
+formulas over (literal, time) variables.
+
+Unrollings are represented as a hash-consed DAG: every distinct Boolean
+node exists once, and the unroller memoises on (subformula, time index), so
+sub-expansions that occur at several places (e.g. the operands of an Until
+at each step of its window) are built once. Temporal operators are
+unrolled through their one-step recurrences, which makes the unrolling
+linear in the size of the formula times the time bound.
+'''
+
+from spec_space.formula import TrueFormula, FalseFormula, Literal, Negation, \
+        Conjunction, Disjunction, Next, VarNext, Globally, Eventually, Until, \
+        WeakUntil, Release
+from spec_space.symbol_sets import PyEDASymbolSet
+
+''' Node ids of the constants '''
+FALSE = 0
+TRUE = 1
+
+
+class BooleanDAG(object):
+    '''
+    Hash-consed Boolean formulas. Nodes are referred to by integer ids and
+    are stored as (op, args) pairs, where op is 'const', 'var', 'not', 'and'
+    or 'or'. Variables are (literal, time) pairs. Node construction applies
+    basic constant folding, so that FALSE and TRUE are the only constant
+    nodes.
+    '''
+
+    def __init__(self):
+        self.nodes = [('const', False), ('const', True)]
+        self.index = {}
+
+    def __node(self, op, args):
+        key = (op, args)
+        if key not in self.index:
+            self.index[key] = len(self.nodes)
+            self.nodes.append(key)
+        return self.index[key]
+
+    def var(self, literal, time):
+        '''
+        Returns the node of the variable (literal, time).
+        '''
+        return self.__node('var', (literal, time))
+
+    def neg(self, x):
+        '''
+        Returns the negation of node x.
+        '''
+        if x == FALSE:
+            return TRUE
+        if x == TRUE:
+            return FALSE
+        op, args = self.nodes[x]
+        if op == 'not':
+            return args
+        return self.__node('not', x)
+
+    def conj(self, xs):
+        '''
+        Returns the conjunction of the given nodes.
+        '''
+        return self.__junction(xs, 'and', FALSE, TRUE)
+
+    def disj(self, xs):
+        '''
+        Returns the disjunction of the given nodes.
+        '''
+        return self.__junction(xs, 'or', TRUE, FALSE)
+
+    def __junction(self, xs, op, absorbing, neutral):
+        args = set()
+        for x in xs:
+            if x == absorbing:
+                return absorbing
+            if x != neutral:
+                args.add(x)
+        if not args:
+            return neutral
+        if len(args) == 1:
+            return args.pop()
+        for x in args:
+            if self.index.get(('not', x)) in args:
+                return absorbing
+        return self.__node(op, tuple(sorted(args)))
+
+    def is_const(self, x):
+        '''
+        Returns true iff node x is FALSE or TRUE.
+        '''
+        return x == FALSE or x == TRUE
+
+    def reachable(self, root):
+        '''
+        Returns the ids of the nodes reachable from root, children before
+        parents.
+        '''
+        order = []
+        seen = set()
+        stack = [(root, False)]
+        while stack:
+            x, expanded = stack.pop()
+            if expanded:
+                order.append(x)
+                continue
+            if x in seen:
+                continue
+            seen.add(x)
+            stack.append((x, True))
+            op, args = self.nodes[x]
+            if op == 'not':
+                stack.append((args, False))
+            elif op == 'and' or op == 'or':
+                for y in args:
+                    stack.append((y, False))
+        return order
+
+    def variables(self, root):
+        '''
+        Returns the (literal, time) variables that root depends on, sorted
+        by time and then by literal.
+        '''
+        found = [self.nodes[x][1] for x in self.reachable(root)
+                if self.nodes[x][0] == 'var']
+        return sorted(found, key=lambda v: (v[1], v[0]))
+
+    def restrict(self, root, assignment):
+        '''
+        Returns the node of the formula rooted at root, with the variables
+        in the given assignment replaced by their values.
+
+        :param assignment: maps (literal, time) variables to bools
+        :type assignment: dict
+        '''
+        image = {}
+        for x in self.reachable(root):
+            op, args = self.nodes[x]
+            if op == 'var':
+                if args in assignment:
+                    image[x] = TRUE if assignment[args] else FALSE
+                else:
+                    image[x] = x
+            elif op == 'not':
+                image[x] = self.neg(image[args])
+            elif op == 'and':
+                image[x] = self.conj([image[y] for y in args])
+            elif op == 'or':
+                image[x] = self.disj([image[y] for y in args])
+            else:
+                image[x] = x
+        return image[root]
+
+    def to_expression(self, root, symbol_set=PyEDASymbolSet):
+        '''
+        Returns a string representation of the formula rooted at the given
+        node, using the given symbol set. Variable (a, t) is named a_t.
+        '''
+        symbols = symbol_set.symbols
+        strings = {}
+        for x in self.reachable(root):
+            op, args = self.nodes[x]
+            if op == 'const':
+                strings[x] = symbols['TRUE'] if args else symbols['FALSE']
+            elif op == 'var':
+                strings[x] = '%s_%d' % args
+            elif op == 'not':
+                strings[x] = symbols['NOT'] + strings[args]
+            else:
+                sep = ' %s ' % symbols['AND' if op == 'and' else 'OR']
+                strings[x] = '(' + sep.join(strings[y] for y in args) + ')'
+        return strings[root]
+
+
+class Unroller(object):
+    '''
+    Unrolls LTL formulas into a BooleanDAG, up to a time bound. Literals at
+    time indexes beyond the bound are false. The formula must have been
+    simplified to literals, constants, negation, conjunction, disjunction,
+    next, globally, eventually, until, weak until and release.
+    '''
+
+    def __init__(self, time_bound, dag=None, key=None):
+        '''
+        :param time_bound: last time index of the unrolling
+        :type time_bound: int
+        :param dag: DAG to add nodes to; a new one by default
+        :type dag: BooleanDAG
+        :param key: function returning a hashable key of a formula that is
+            equal for structurally equal formulas, such as the key assigned
+            by Measurer.compute_deps; by default, formulas are memoised by
+            identity and kept alive
+        :type key: function
+        '''
+        if dag is None:
+            dag = BooleanDAG()
+        self.time_bound = time_bound
+        self.dag = dag
+        self.key = key
+        self.memo = {}
+
+    def unroll(self, f, n=0):
+        '''
+        Returns the DAG node of the given formula at time offset n.
+        '''
+        key = (self.__key(f), n)
+        if key not in self.memo:
+            self.memo[key] = self.__pin(f, self.__unroll_node(f, n))
+        return self.memo[key][0]
+
+    def __key(self, f):
+        if self.key is None:
+            return id(f)
+        return self.key(f)
+
+    def __pin(self, f, node):
+        ''' Without structural keys, keep f alive so that its id is not
+            reused. '''
+        return (node, f if self.key is None else None)
+
+    def __unroll_node(self, f, n):
+        N = self.time_bound
+        dag = self.dag
+
+        if isinstance(f, TrueFormula):
+            return TRUE
+
+        if isinstance(f, FalseFormula):
+            return FALSE
+
+        if isinstance(f, Literal):
+            if n > N:
+                return FALSE
+            return dag.var(f.generate(with_base_names=True), n)
+
+        if isinstance(f, Negation):
+            return dag.neg(self.unroll(f.right_formula, n))
+
+        if isinstance(f, Conjunction):
+            return dag.conj([self.unroll(f.left_formula, n),
+                    self.unroll(f.right_formula, n)])
+
+        if isinstance(f, Disjunction):
+            return dag.disj([self.unroll(f.left_formula, n),
+                    self.unroll(f.right_formula, n)])
+
+        if isinstance(f, Next) or isinstance(f, VarNext):
+            return self.unroll(f.right_formula, n+1)
+
+        if isinstance(f, Globally) or isinstance(f, Eventually) \
+                or isinstance(f, Until) or isinstance(f, WeakUntil) \
+                or isinstance(f, Release):
+            ''' G g holds at i iff g holds at i and G g holds at i+1; it
+                holds beyond the bound. F g is the same with a disjunction,
+                and does not hold beyond the bound. f U g holds at i iff g
+                holds at i, or f holds at i and f U g holds at i+1; it does
+                not hold beyond the bound. f W g is the same, except that it
+                holds beyond the bound. f R g holds at i iff g holds at i,
+                and f holds at i or f R g holds at i+1; it holds beyond the
+                bound. Each step adds a constant number of nodes, so nested
+                operators stay linear in the bound. The missing later steps
+                are unrolled first, from the bound backwards, so that
+                recursion stays shallow. '''
+            key = self.__key(f)
+            i = n + 1
+            while i <= N and (key, i) not in self.memo:
+                i += 1
+            for j in range(i-1, n, -1):
+                self.memo[(key, j)] = self.__pin(f, self.__step(f, j))
+            return self.__step(f, n)
+
+        raise Exception("Unsupported AST node: " + type(f).__name__)
+
+    def __step(self, f, i):
+        '''
+        Returns the node of G g, F g, f U g, f W g or f R g at time i, given
+        that of time i+1.
+        '''
+        if i > self.time_bound:
+            if isinstance(f, Eventually) or isinstance(f, Until):
+                return FALSE
+            return TRUE
+        later = self.unroll(f, i+1)
+        right = self.unroll(f.right_formula, i)
+        if isinstance(f, Globally):
+            return self.dag.conj([right, later])
+        if isinstance(f, Eventually):
+            return self.dag.disj([right, later])
+        left = self.unroll(f.left_formula, i)
+        if isinstance(f, Release):
+            return self.dag.conj([right, self.dag.disj([left, later])])
+        return self.dag.disj([right, self.dag.conj([left, later])])
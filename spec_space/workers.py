@@ -0,0 +1,289 @@
+'''
+This module contains a pool of persistent helper processes for model
+counting.
+
+Helpers are started once and then serve counting requests for the lifetime
+of the pool, so that a job with thousands of counts does not start a
+process per count. Each helper runs a SelectingCounter: small CNFs are
+counted inside the helper, and larger ones by sharpSAT, which has no server
+mode of its own.
+
+Requests and responses are single lines of JSON over the helpers' standard
+input and output. A request carries a batch of CNFs,
+    {"id": 7, "cnfs": ["p cnf 2 1\\n1 2 0", ...]}
+and is answered by their counts, with null for those that failed, and an
+[index, kind, message] entry per failure, where kind is "timeout" or
+"error",
+    {"id": 7, "counts": [3, null, ...], "errors": [[1, "timeout", "..."]]}
+so that one failure does not lose the other counts of the batch. Each
+helper has at most one request in flight.
+'''
+
+import json
+import os
+import select
+import signal
+import sys
+import time
+from subprocess import Popen, PIPE
+
+from spec_space import LOG
+from spec_space.counting import ModelCounter, SelectingCounter, SharpSAT, \
+        DPLLCounter, CountingError, CountingTimeout
+
+
+class Helper(object):
+    '''
+    A helper process, with the deadline of its request in flight.
+    '''
+
+    def __init__(self, options):
+        '''
+        :param options: options of the counter run by the helper (see
+            helper_counter)
+        :type options: dict
+        '''
+        ''' Make sure the helper imports this copy of spec_space. '''
+        env = dict(os.environ)
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env['PYTHONPATH'] = os.pathsep.join(p for p in
+                (root, env.get('PYTHONPATH')) if p)
+        self.process = Popen([sys.executable, '-m', 'spec_space.workers',
+                json.dumps(options)], stdin=PIPE, stdout=PIPE, env=env,
+                start_new_session=True)
+        self.buffer = b''
+        self.deadline = None
+
+    def fileno(self):
+        return self.process.stdout.fileno()
+
+    def send(self, request, timeout):
+        '''
+        Sends a request, which must be answered within timeout seconds, if
+        timeout is given.
+        '''
+        self.deadline = None if timeout is None else time.time() + timeout
+        self.process.stdin.write(json.dumps(request).encode('UTF-8') + b'\n')
+        self.process.stdin.flush()
+
+    def receive(self):
+        '''
+        Reads the output available and returns the response to the request
+        in flight once complete, or None.
+        '''
+        data = os.read(self.fileno(), 1 << 16)
+        if not data:
+            raise CountingError('helper process exited')
+        self.buffer += data
+        if b'\n' not in self.buffer:
+            return None
+        line, self.buffer = self.buffer.split(b'\n', 1)
+        return json.loads(line.decode('UTF-8'))
+
+    def close(self):
+        '''
+        Stops the helper process, and the solver it may be running.
+        '''
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+
+class WorkerPool(ModelCounter):
+    '''
+    Counts models using a pool of persistent helper processes. Counts are
+    sent to the helpers in batches of up to batch_size CNFs. The helpers
+    give up on a CNF after timeout seconds; as a safeguard, a helper that
+    does not answer a batch within timeout seconds per CNF (plus a second)
+    is replaced.
+    In both cases, count_many raises CountingError, and try_count_many
+    leaves the failed counts None.
+    '''
+
+    ''' Counts of several CNFs are computed concurrently by count_many. '''
+    concurrent = True
+
+    def __init__(self, size=None, batch_size=16, timeout=None, **options):
+        '''
+        :param size: number of helper processes; the number of CPUs by
+            default
+        :type size: int
+        :param batch_size: maximal number of CNFs per request
+        :type batch_size: int
+        :param timeout: time budget in seconds per CNF, unbounded if None
+        :type timeout: float
+        :param options: options of the counter of each helper (see
+            helper_counter)
+        '''
+        if size is None:
+            size = os.cpu_count() or 1
+        self.size = size
+        self.batch_size = batch_size
+        self.timeout = timeout
+        options = dict(options)
+        options.setdefault('timeout', timeout)
+        self.options = options
+        self.helpers = [Helper(options) for _ in range(size)]
+        self.requests = 0
+
+    def count(self, dimacs):
+        '''
+        Returns the number of models of the given DIMACS CNF.
+
+        :param dimacs: CNF in DIMACS format
+        :type dimacs: string
+        '''
+        return self.count_many([dimacs])[0]
+
+    def count_many(self, dimacs_list):
+        '''
+        Returns the numbers of models of the given DIMACS CNFs, in order.
+        Raises CountingError as soon as a count fails.
+
+        :param dimacs_list: CNFs in DIMACS format
+        :type dimacs_list: list
+        '''
+        return self.__run(dimacs_list, False)
+
+    def try_count_many(self, dimacs_list):
+        '''
+        Returns the numbers of models of the given DIMACS CNFs, in order,
+        with None for each CNF whose count failed. The other counts are
+        still computed; failures are logged.
+
+        :param dimacs_list: CNFs in DIMACS format
+        :type dimacs_list: list
+        '''
+        return self.__run(dimacs_list, True)
+
+    def __run(self, dimacs_list, tolerant):
+        '''
+        Counts the given CNFs on the helpers. If tolerant, failed counts are
+        logged and left None; otherwise, the first failure is raised.
+        '''
+        dimacs_list = list(dimacs_list)
+        batches = []
+        per_helper = -(-len(dimacs_list) // self.size)
+        step = max(1, min(self.batch_size, per_helper))
+        for i in range(0, len(dimacs_list), step):
+            batches.append((i, dimacs_list[i:i+step]))
+        batches.reverse()
+
+        counts = [None] * len(dimacs_list)
+        busy = {}
+
+        def fail(error):
+            if not tolerant:
+                raise error
+            LOG.warning("model counting failed: %s" % error)
+
+        try:
+            while batches or busy:
+                for helper in self.helpers:
+                    if batches and helper not in busy:
+                        start, batch = batches.pop()
+                        self.requests += 1
+                        timeout = None
+                        if self.timeout is not None:
+                            ''' Leave the helper time to report its own
+                                timeouts. '''
+                            timeout = self.timeout * len(batch) + 1
+                        helper.send({'id': self.requests, 'cnfs': batch}, timeout)
+                        busy[helper] = start
+
+                deadlines = [h.deadline for h in busy if h.deadline is not None]
+                wait = None
+                if deadlines:
+                    wait = max(0, min(deadlines) - time.time())
+                ready, _, _ = select.select(list(busy), [], [], wait)
+
+                for helper in ready:
+                    response = helper.receive()
+                    if response is None:
+                        continue
+                    start = busy.pop(helper)
+                    if 'error' in response:
+                        fail(CountingError(response['error']))
+                        continue
+                    counts[start:start+len(response['counts'])] = response['counts']
+                    for _, kind, message in response.get('errors', ()):
+                        if kind == 'timeout':
+                            fail(CountingTimeout(message))
+                        else:
+                            fail(CountingError(message))
+
+                now = time.time()
+                for helper in list(busy):
+                    if helper.deadline is not None and helper.deadline < now:
+                        self.__replace(helper)
+                        busy.pop(helper)
+                        fail(CountingTimeout('model counting timed out'))
+        except BaseException:
+            ''' Responses still in flight would be mistaken for answers to
+                later requests. '''
+            for helper in list(busy):
+                self.__replace(helper)
+            raise
+        return counts
+
+    def __replace(self, helper):
+        '''
+        Stops the given helper and starts a new one in its place.
+        '''
+        LOG.debug('replacing helper process %d' % helper.process.pid)
+        helper.close()
+        self.helpers[self.helpers.index(helper)] = Helper(self.options)
+
+    def close(self):
+        '''
+        Stops all helper processes.
+        '''
+        for helper in self.helpers:
+            helper.close()
+        self.helpers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def helper_counter(binary=None, timeout=None, memory=None, **options):
+    '''
+    Returns the counter run by a helper: a SelectingCounter with the given
+    options (max_vars, max_clauses), which counts small CNFs in-process and
+    large ones with the sharpSAT binary at the given path. Both get the time
+    budget; sharpSAT also gets the memory budget.
+    '''
+    return SelectingCounter(small=DPLLCounter(timeout),
+            large=SharpSAT(binary, timeout=timeout, memory=memory), **options)
+
+
+def serve(counter, infile, outfile):
+    '''
+    Answers the requests read from infile with the given counter, writing
+    the responses to outfile.
+    '''
+    for line in infile:
+        request = json.loads(line)
+        counts = []
+        errors = []
+        for i, cnf in enumerate(request['cnfs']):
+            try:
+                counts.append(counter.count(cnf))
+            except Exception as e:
+                counts.append(None)
+                kind = 'timeout' if isinstance(e, CountingTimeout) else 'error'
+                errors.append([i, kind, str(e)])
+        response = {'id': request['id'], 'counts': counts, 'errors': errors}
+        outfile.write(json.dumps(response) + '\n')
+        outfile.flush()
+
+
+if __name__ == '__main__':
+    serve(helper_counter(**json.loads(sys.argv[1])), sys.stdin, sys.stdout)
@@ -0,0 +1,152 @@
+'''
+Brute-force reference for the measure of LTL formulas: enumerates every
+trace over the literals of a formula up to the time bound and evaluates the
+bounded semantics directly on the AST.
+'''
+
+from fractions import Fraction
+from itertools import product
+
+from spec_space.formula import TrueFormula, FalseFormula, Literal, Negation, \
+        Conjunction, Disjunction, Implication, DoubleImplication, Next, \
+        VarNext, Globally, Eventually, Until, WeakUntil, Release, \
+        BinaryFormula, UnaryFormula
+from spec_space.measure import parse
+
+''' Formulas over at most three literals, covering every operator '''
+FORMULAS = [
+    'a',
+    '~a & X a',
+    'a | X X b',
+    'a -> X b',
+    'a <-> X a',
+    'G a',
+    'F (a & X b)',
+    'G (a -> F b)',
+    'F G a',
+    'G F (a | b)',
+    'a U b',
+    'a W b',
+    'a R b',
+    '(a U b) & (b -> c)',
+    'a R (b U X c)',
+    '(a W b) | (c & X c)',
+    '(a & b) | (a & ~c) | (X a & c)',
+    '(a | b) & (a | c) & (b | ~c)',
+    'G (a | b) | F (a & c)',
+    'X G a & F X ~a',
+]
+
+
+def literals(f):
+    '''
+    Returns the sorted names of the literals of f.
+    '''
+    if isinstance(f, Literal):
+        return [f.generate(with_base_names=True)]
+    names = set()
+    if isinstance(f, BinaryFormula):
+        names.update(literals(f.left_formula), literals(f.right_formula))
+    elif isinstance(f, UnaryFormula):
+        names.update(literals(f.right_formula))
+    return sorted(names)
+
+
+def holds(f, trace, i, N):
+    '''
+    Returns whether f holds at time i of the trace (a dict from literal
+    names to lists of N+1 bools) under bounded semantics.
+    '''
+    if isinstance(f, TrueFormula):
+        return True
+    if isinstance(f, FalseFormula):
+        return False
+    if isinstance(f, Literal):
+        return i <= N and trace[f.generate(with_base_names=True)][i]
+    if isinstance(f, Negation):
+        return not holds(f.right_formula, trace, i, N)
+    if isinstance(f, (Next, VarNext)):
+        return holds(f.right_formula, trace, i+1, N)
+    if isinstance(f, Globally):
+        return all(holds(f.right_formula, trace, j, N) for j in range(i, N+1))
+    if isinstance(f, Eventually):
+        return any(holds(f.right_formula, trace, j, N) for j in range(i, N+1))
+
+    def l(j):
+        return holds(f.left_formula, trace, j, N)
+
+    def r(j):
+        return holds(f.right_formula, trace, j, N)
+
+    if isinstance(f, Conjunction):
+        return l(i) and r(i)
+    if isinstance(f, Disjunction):
+        return l(i) or r(i)
+    if isinstance(f, Implication):
+        return not l(i) or r(i)
+    if isinstance(f, DoubleImplication):
+        return l(i) == r(i)
+    if isinstance(f, (Until, WeakUntil)):
+        for j in range(i, N+1):
+            if r(j):
+                return True
+            if not l(j):
+                return False
+        return isinstance(f, WeakUntil)
+    if isinstance(f, Release):
+        return all(r(j) or any(l(k) for k in range(i, j))
+                for j in range(i, N+1))
+    raise Exception("Unsupported AST node: " + type(f).__name__)
+
+
+def reference_measure(text, N):
+    '''
+    Returns the exact measure of the given formula under time bound N, as a
+    Fraction.
+    '''
+    f = parse(text)
+    names = literals(f)
+    steps = N + 1
+    count = 0
+    for bits in product((False, True), repeat=len(names) * steps):
+        trace = dict((name, bits[k*steps:(k+1)*steps])
+                for k, name in enumerate(names))
+        count += holds(f, trace, 0, N)
+    return Fraction(count, 2 ** (len(names) * steps))
+
+
+def cases(max_bits=12, bounds=range(4)):
+    '''
+    Returns the (formula, N) pairs of FORMULAS whose traces have at most
+    max_bits bits.
+    '''
+    return [(text, N) for N in bounds for text in FORMULAS
+            if len(literals(parse(text))) * (N + 1) <= max_bits]
+
+
+def dag_models(dag, root):
+    '''
+    Returns the number of models of a BooleanDAG node over the variables
+    it depends on, and the number of these, by evaluating it on every
+    assignment.
+    '''
+    variables = dag.variables(root)
+    order = dag.reachable(root)
+    count = 0
+    for values in product((False, True), repeat=len(variables)):
+        assignment = dict(zip(variables, values))
+        value = {}
+        for x in order:
+            op, args = dag.nodes[x]
+            if op == 'const':
+                value[x] = args
+            elif op == 'var':
+                value[x] = assignment[args]
+            elif op == 'not':
+                value[x] = not value[args]
+            elif op == 'and':
+                value[x] = all(value[y] for y in args)
+            else:
+                value[x] = any(value[y] for y in args)
+        count += value[root]
+    return count, len(variables)
@@ -0,0 +1,36 @@
+import pytest
+
+from spec_space.approx import ApproxCounter
+from spec_space.counting import CountingError, CountingTimeout, DPLLCounter, \
+        ModelCounter
+from spec_space.measure import Measurer
+from spec_space.numeric import Interval
+
+''' 504 models over 10 variables, above the threshold of the counter '''
+MANY = 'p cnf 10 3\n1 2 0\n3 -4 0\n5 6 7 0\n'
+FEW = 'p cnf 4 2\n1 2 0\n-3 4 0\n'
+
+
+class FailingCounter(ModelCounter):
+
+    def count(self, dimacs):
+        raise CountingError('no count')
+
+
+def test_bounds_contain_the_count():
+    counter = ApproxCounter(seed=1)
+    assert counter.count_bounds(FEW) == (9, 9, 9)
+    estimate, lower, upper = counter.count_bounds(MANY)
+    assert lower <= DPLLCounter().count(MANY) <= upper
+    assert lower <= estimate <= upper
+
+
+def test_timeout():
+    with pytest.raises(CountingTimeout):
+        ApproxCounter(timeout=0).count_bounds(MANY)
+
+
+def test_timeout_gives_up_on_the_measure():
+    m = Measurer(6, bypass_count=False, truth_table_limit=0,
+            counter=FailingCounter(), on_failure=ApproxCounter(timeout=0))
+    assert m.measure('G (a -> F b) & (c U d)') == Interval(0, 1)
@@ -0,0 +1,35 @@
+import pytest
+
+from spec_space.automaton import AutomatonEngine
+from spec_space.counting import DPLLCounter
+from spec_space.measure import Measurer, parse, simplify, traverse
+from tests.reference import FORMULAS, cases, reference_measure
+
+
+@pytest.mark.parametrize('text,N', cases())
+def test_automaton_matches_reference(text, N):
+    m = Measurer(N, numeric='exact', engine='automaton')
+    assert m.measure(text) == reference_measure(text, N)
+
+
+@pytest.mark.parametrize('dense_limit', [0, 64])
+def test_float_and_exact_agree(dense_limit):
+    f = traverse(parse('G (a -> F b) & (c U X a)'), simplify)
+    exact = AutomatonEngine('exact', dense_limit)
+    approx = AutomatonEngine('float', dense_limit)
+    for N in [0, 5, 40, 17, 300]:
+        assert approx.measure(f, N) == pytest.approx(float(exact.measure(f, N)))
+
+
+def test_automaton_matches_unrolling():
+    for text in FORMULAS:
+        unrolled = Measurer(12, numeric='exact',
+                counter=DPLLCounter()).measure(text)
+        assert Measurer(12, numeric='exact', engine='automaton').measure(text) \
+                == unrolled
+
+
+def test_sweep():
+    m = Measurer(6, numeric='exact', engine='automaton')
+    assert list(m.measure_sweep('a U b', range(7))) \
+            == [reference_measure('a U b', N) for N in range(7)]
@@ -0,0 +1,32 @@
+import pytest
+
+from spec_space.bdd import BDDCounter, BDDLimitError
+from spec_space.measure import Measurer, parse, simplify, traverse
+from spec_space.unroll import Unroller
+from tests.reference import FORMULAS, cases, dag_models, reference_measure
+
+
+def unrolled(text, N):
+    unroller = Unroller(N)
+    return unroller.dag, unroller.unroll(traverse(parse(text), simplify))
+
+
+@pytest.mark.parametrize('text', FORMULAS)
+def test_counts_match_brute_force(text):
+    dag, root = unrolled(text, 2)
+    assert BDDCounter(dag).count(root) == dag_models(dag, root)
+
+
+def test_node_limit():
+    dag, root = unrolled('G (a | X b) & F (b & X a)', 6)
+    counter = BDDCounter(dag, max_nodes=8)
+    with pytest.raises(BDDLimitError):
+        counter.count(root)
+
+
+@pytest.mark.parametrize('bdd_limit', [8, 100000])
+def test_bdd_encoder(bdd_limit):
+    for text, N in cases(max_bits=9):
+        m = Measurer(N, numeric='exact', bypass_count=False,
+                truth_table_limit=0, encoder='bdd', bdd_limit=bdd_limit)
+        assert m.measure(text) == reference_measure(text, N)
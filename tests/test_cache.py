@@ -0,0 +1,62 @@
+from spec_space.cache import CountCache
+from spec_space.counting import CountingError, DPLLCounter, ModelCounter
+from spec_space.measure import Measurer
+from tests.reference import reference_measure
+
+
+def dimacs(nvars, clauses):
+    return 'p cnf %d %d\n' % (nvars, len(clauses)) + ''.join(
+            ' '.join(str(lit) for lit in clause) + ' 0\n' for clause in clauses)
+
+
+def test_round_trip_with_renamed_cnf(tmp_path):
+    path = str(tmp_path / 'counts.db')
+    cache = CountCache(path)
+    cache.put(dimacs(3, [(1, -2), (2, 3)]), 4)
+    cache.put_expression('Or(a, b)', 3, 2)
+    cache.close()
+
+    cache = CountCache(path)
+    ''' Same CNF with variables renamed and clauses reordered '''
+    assert cache.get(dimacs(3, [(3, 2), (1, -3)])) == 4
+    assert cache.get(dimacs(3, [(1, 2), (2, 3)])) is None
+    assert cache.get_expression('Or(a, b)') == (3, 2)
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'entries': 2}
+    cache.close()
+
+
+def test_hits_are_kept_on_eviction(tmp_path):
+    path = str(tmp_path / 'counts.db')
+    cache = CountCache(path, max_entries=2)
+    cache.put(dimacs(1, [(1,)]), 1)
+    cache.put(dimacs(2, [(1, 2)]), 3)
+    assert cache.get(dimacs(1, [(1,)])) == 1
+    cache.put(dimacs(2, [(1,), (2,)]), 1)
+    assert len(cache) == 2
+    assert cache.get(dimacs(1, [(1,)])) == 1
+    assert cache.get(dimacs(2, [(1, 2)])) is None
+    cache.close()
+
+
+class NoCounter(ModelCounter):
+
+    def count(self, dimacs):
+        raise CountingError('counts must come from the cache')
+
+
+def test_measurer_reuses_cached_expressions(tmp_path):
+    path = str(tmp_path / 'counts.db')
+    texts = ['G (a -> F b)', 'a R (b U X c)', '(a U b) & (b -> c)']
+    cache = CountCache(path)
+    m = Measurer(2, numeric='exact', bypass_count=False, truth_table_limit=0,
+            counter=DPLLCounter(), count_cache=cache)
+    measures = [m.measure(text) for text in texts]
+    assert measures == [reference_measure(text, 2) for text in texts]
+    cache.close()
+
+    cache = CountCache(path)
+    m = Measurer(2, numeric='exact', bypass_count=False, truth_table_limit=0,
+            counter=NoCounter(), count_cache=cache)
+    assert [m.measure(text) for text in texts] == measures
+    assert cache.stats()['misses'] == 0
+    cache.close()
@@ -0,0 +1,105 @@
+import os
+import random
+import sys
+from itertools import product
+from subprocess import check_output
+
+import pytest
+
+from spec_space.cache import parse_dimacs
+from spec_space.counting import CountingError, CountingTimeout, DPLLCounter, \
+        SelectingCounter, SharpSAT
+
+
+def dimacs(nvars, clauses):
+    return 'p cnf %d %d\n' % (nvars, len(clauses)) + ''.join(
+            ' '.join(str(lit) for lit in clause) + ' 0\n' for clause in clauses)
+
+
+def brute_force(text):
+    nvars, clauses = parse_dimacs(text)
+    return sum(all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause)
+            for clause in clauses)
+            for values in product((False, True), repeat=nvars))
+
+
+def random_cnfs(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        nvars = rng.randint(1, 10)
+        clauses = [tuple(rng.choice((-1, 1)) * rng.randint(1, nvars)
+                for _ in range(rng.randint(1, 3)))
+                for _ in range(rng.randint(0, 2 * nvars))]
+        yield dimacs(nvars, clauses)
+
+
+def test_dpll_matches_brute_force():
+    counter = DPLLCounter()
+    for text in random_cnfs(200):
+        assert counter.count(text) == brute_force(text)
+
+
+def test_dpll_special_cases():
+    counter = DPLLCounter()
+    assert counter.count(dimacs(3, [])) == 8
+    assert counter.count(dimacs(2, [(1,), (-1,)])) == 0
+    ''' Two components and a free variable '''
+    assert counter.count(dimacs(5, [(1, 2), (3, -4)])) == 3 * 3 * 2
+
+
+def test_dpll_timeout():
+    clauses = [(i, i + 1) for i in range(1, 40)]
+    with pytest.raises(CountingTimeout):
+        DPLLCounter(timeout=0).count(dimacs(40, clauses))
+
+
+def test_selecting_counter_counts_small_cnfs_in_process():
+    counter = SelectingCounter()
+    for text in random_cnfs(20, seed=1):
+        assert counter.count(text) == brute_force(text)
+
+
+STUB = '''#!%s
+import sys
+with open(sys.argv[1]) as cnf:
+    lines = [line for line in cnf if line.strip() and line[0] not in 'cp']
+print('# solutions \\n%%d\\n# END' %% (100 + len(lines)))
+'''
+
+
+@pytest.fixture
+def stub(tmp_path):
+    ''' A sharpSAT stand-in that reports 100 plus the number of clauses as
+        the count, so that it is seen to read the CNF. '''
+    path = tmp_path / 'sharpSAT'
+    path.write_text(STUB % sys.executable)
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.mark.parametrize('pipe', [False, True])
+def test_sharpsat(stub, tmp_path, pipe):
+    counter = SharpSAT(stub, tmpdir=str(tmp_path), pipe=pipe)
+    assert counter.count(dimacs(3, [(1, 2), (-3,)])) == 102
+    assert [p.name for p in tmp_path.iterdir()] == ['sharpSAT']
+
+
+def test_sharpsat_failures(tmp_path):
+    with pytest.raises(CountingError):
+        SharpSAT(str(tmp_path / 'missing')).count(dimacs(1, [(1,)]))
+    with pytest.raises(CountingError):
+        SharpSAT.parse_output('no count')
+
+
+def test_default_sharpsat(stub, tmp_path):
+    script = 'from spec_space.counting import DEFAULT_SHARPSAT; ' \
+            'print(DEFAULT_SHARPSAT)'
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    env.pop('SPEC_SPACE_SHARPSAT', None)
+    default = check_output([sys.executable, '-c', script], cwd=str(tmp_path),
+            env=env).decode().strip()
+    assert default == os.path.join(root, 'bin', 'sharpSAT')
+    env['SPEC_SPACE_SHARPSAT'] = stub
+    assert check_output([sys.executable, '-c', script], cwd=str(tmp_path),
+            env=env).decode().strip() == stub
@@ -0,0 +1,233 @@
+import math
+from fractions import Fraction
+
+import pytest
+
+from spec_space.counting import CountingError, DPLLCounter, ModelCounter, \
+        SelectingCounter
+from spec_space.measure import Measurer, main
+from spec_space.numeric import Interval
+from tests.reference import FORMULAS, cases, reference_measure
+
+
+@pytest.mark.parametrize('text,N', cases())
+def test_measure_matches_reference(text, N):
+    assert Measurer(N, numeric='exact').measure(text) == reference_measure(text, N)
+
+
+@pytest.mark.parametrize('bypass_count', [True, False])
+def test_float_measure(bypass_count):
+    m = Measurer(2, bypass_count=bypass_count)
+    for text in FORMULAS[:10]:
+        assert m.measure(text) == pytest.approx(float(reference_measure(text, 2)))
+
+
+def test_distance():
+    m = Measurer(2, numeric='exact')
+    expected = reference_measure('(F a & ~(a U b)) | (~F a & (a U b))', 2)
+    assert m.distance('F a', 'a U b') == expected
+    assert m.distance('a U b', 'a U b') == 0
+
+
+def test_batch_and_matrix():
+    m = Measurer(2, numeric='exact')
+    texts = ['F a', 'G a', 'a U b', 'F a']
+    assert list(m.measure_batch(texts)) == [reference_measure(t, 2) for t in texts]
+    matrix = m.distance_matrix(texts[:3])
+    assert matrix[0][0] == 0
+    assert matrix[0][1] == matrix[1][0] == m.distance('F a', 'G a')
+
+
+def test_negative_time_bound():
+    with pytest.raises(ValueError):
+        Measurer(-1)
+
+
+def test_repeated_distance_does_not_grow_unrolling_memo():
+    m = Measurer(3, bypass_count=False)
+    m.distance('F a', 'a U b')
+    size = len(m.unroller.memo)
+    for _ in range(5):
+        m.distance('F a', 'a U b')
+    assert len(m.unroller.memo) == size
+    assert all(pinned is None for _, pinned in m.unroller.memo.values())
+
+
+def test_worker_pool_is_reused_until_closed():
+    with Measurer(2, numeric='exact', workers=2, executor='thread',
+            bypass_count=False, truth_table_limit=0) as m:
+        texts = ['a U b', 'G (a -> F b)']
+        assert list(m.measure_batch(texts)) == [reference_measure(t, 2) for t in texts]
+        pool = m._pool
+        assert pool is not None
+        m.measure('F (a & X b)')
+        assert m._pool is pool
+    assert m._pool is None
+
+
+class FailingCounter(ModelCounter):
+
+    def __init__(self):
+        self.calls = []
+
+    def count(self, dimacs):
+        self.calls.append(dimacs)
+        raise CountingError('no count')
+
+
+def test_failed_counts_are_not_retried_in_parallel():
+    counter = FailingCounter()
+    m = Measurer(2, bypass_count=False, truth_table_limit=0, counter=counter,
+            on_failure='bounds', workers=2, executor='thread')
+    texts = ['G (a -> F b)', '~G (a -> F b)', 'G (a -> F b) | c']
+    for _ in range(2):
+        for measure in m.measure_batch(texts):
+            assert measure == Interval(0, 1)
+    assert len(counter.calls) == len(set(counter.calls))
+
+
+@pytest.mark.parametrize('text,N', cases(max_bits=9))
+def test_exact_measure_by_counting(text, N):
+    m = Measurer(N, numeric='exact', bypass_count=False, truth_table_limit=0)
+    assert m.measure(text) == reference_measure(text, N)
+
+
+@pytest.mark.parametrize('bypass_count', [True, False])
+def test_log_measure(bypass_count):
+    for N in range(3):
+        m = Measurer(N, numeric='log', bypass_count=bypass_count)
+        for text in FORMULAS:
+            assert float(m.measure(text)) \
+                    == pytest.approx(float(reference_measure(text, N)))
+
+
+def test_log_measure_at_large_time_bound():
+    m = Measurer(3000, numeric='log')
+    assert m.measure('G a').lp == pytest.approx(-3001 * math.log(2))
+    assert m.measure('F a').lq == pytest.approx(-3001 * math.log(2))
+
+
+CHAINS = ['(a & X a) & (b | c) & (X b | a)', '(a | b) | (c & X c) | X a',
+        'a & b & (c U a) & F c', '(a U b) | (a & c) | X (b & c)']
+
+
+@pytest.mark.parametrize('text', CHAINS)
+def test_components(text):
+    m = Measurer(2, numeric='exact', truth_table_limit=0)
+    f = m.prepare(text)
+    parts = m._components(f)
+    for i, part in enumerate(parts):
+        for other in parts[:i]:
+            assert part.info['deps'].vardisjoint(other.info['deps'])
+    assert m.measure(f) == reference_measure(text, 2)
+
+
+def test_components_split_on_variables():
+    m = Measurer(2)
+    ''' X a and a share no (literal, time) variable. '''
+    f = m.prepare('(a & X a) & (b | c) & (X b | a)')
+    assert len(m._components(f)) == 3
+    f = m.prepare('(a & b) | (b & c) | F (c & X d)')
+    assert m._components(f) == [f]
+
+
+class RecordingCounter(SelectingCounter):
+
+    def __init__(self):
+        SelectingCounter.__init__(self)
+        self.calls = 0
+
+    def count(self, dimacs):
+        self.calls += 1
+        return SelectingCounter.count(self, dimacs)
+
+
+@pytest.mark.parametrize('condition_limit', [0, 3, 6])
+def test_conditioning(condition_limit):
+    for text, N in cases(max_bits=9):
+        m = Measurer(N, numeric='exact', truth_table_limit=0,
+                condition_limit=condition_limit)
+        assert m.measure(text) == reference_measure(text, N)
+
+
+def test_conditioning_avoids_counting():
+    text = '(a | b) & (a | c) & (b | ~c)'
+    counts = []
+    for condition_limit in [0, 3]:
+        counter = RecordingCounter()
+        m = Measurer(0, numeric='exact', truth_table_limit=0,
+                counter=counter, condition_limit=condition_limit)
+        assert m.measure(text) == reference_measure(text, 0)
+        counts.append(counter.calls)
+    assert counts[0] > 0 and counts[1] == 0
+
+
+def test_replace():
+    m = Measurer(2, numeric='exact')
+    f = m.prepare('(a U b) & (b -> c)')
+    assert m.measure(f) == reference_measure('(a U b) & (b -> c)', 2)
+    g = m.replace(f, f.left_formula, 'a W b')
+    assert g is f
+    assert m.measure(f) == reference_measure('(a W b) & (b -> c)', 2)
+    m.replace(f, f.left_formula, 'X c')
+    assert m.measure(f) == reference_measure('X c & (b -> c)', 2)
+    assert m.measure(m.replace(f, f, 'G a')) == reference_measure('G a', 2)
+    with pytest.raises(ValueError):
+        m.replace(f, m.prepare('a'), 'b')
+
+
+def test_replace_after_measuring_a_subformula():
+    m = Measurer(2, numeric='exact')
+    f = m.prepare('(a U b) & G (a -> X c)')
+    assert m.measure(f.right_formula) == reference_measure('G (a -> X c)', 2)
+    assert m.prepare(f.right_formula) is f.right_formula
+    m.replace(f, f.right_formula, 'F c')
+    assert m.measure(f) == reference_measure('(a U b) & F c', 2)
+
+
+def test_replace_rejects_nodes_of_other_formulas():
+    m = Measurer(2, numeric='exact')
+    f = m.prepare('a U b')
+    g = m.prepare('c & b')
+    with pytest.raises(ValueError):
+        m.replace(f, g.left_formula, 'a')
+    assert m.measure(g) == reference_measure('c & b', 2)
+    assert m.measure(f) == reference_measure('a U b', 2)
+
+
+@pytest.mark.parametrize('bypass_count', [True, False])
+def test_sweep(bypass_count):
+    bounds = [2, 0, 3, 1, 3]
+    for text in ['a U b', 'G (a -> F b)', 'a R (b U X c)', 'F G a']:
+        m = Measurer(3, numeric='exact', bypass_count=bypass_count,
+                counter=DPLLCounter())
+        assert list(m.measure_sweep(text, bounds)) \
+                == [reference_measure(text, N) for N in bounds]
+        assert m.measure(text) == reference_measure(text, 3)
+    with pytest.raises(ValueError):
+        Measurer(3).measure_sweep('a', [4])
+
+
+@pytest.mark.parametrize('text,N', cases(max_bits=9))
+def test_pyeda_encoder(text, N):
+    m = Measurer(N, numeric='exact', bypass_count=False, truth_table_limit=0,
+            counter=DPLLCounter(), encoder='pyeda')
+    assert m.measure(text) == reference_measure(text, N)
+
+
+@pytest.mark.parametrize('option,diagonal', [('-x', '0'), ('-l', '0.0')])
+def test_matrix_output(tmp_path, capsys, option, diagonal):
+    path = tmp_path / 'formulas.txt'
+    path.write_text('F a\nG a\n')
+    main(['measure.py', option, '-m', '2', str(path)])
+    out = capsys.readouterr().out
+    assert 'Dyadic' not in out and 'LogProbability' not in out
+    rows = [row.strip('[] ').split() for row in out.strip().splitlines()]
+    assert rows[0][0] == rows[1][1] == diagonal
+    assert float(Fraction(rows[0][1])) == pytest.approx(0.75)
+
+
+def test_matrix_diagonal_numeric():
+    for numeric in ['exact', 'log']:
+        matrix = Measurer(2, numeric=numeric).distance_matrix(['F a', 'G a'])
+        assert type(matrix[0][0]) is type(matrix[0][1])
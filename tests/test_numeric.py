@@ -0,0 +1,44 @@
+import math
+from fractions import Fraction
+
+from spec_space.numeric import Dyadic, ratio
+
+
+def test_dyadic_arithmetic():
+    x = Dyadic(3, 2)
+    y = Dyadic(5, 3)
+    assert (x.num, x.exp) == (3, 2)
+    assert Dyadic(12, 4) == x
+    assert (x + y).fraction() == Fraction(11, 8)
+    assert (x - y).fraction() == Fraction(1, 8)
+    assert (x * y).fraction() == Fraction(15, 32)
+    assert (1 - x).fraction() == Fraction(1, 4)
+    assert x - x == 0 and (x - x).exp == 0
+    assert Dyadic(1, -3) == 8
+    assert y < x and x > y and hash(Dyadic(6, 3)) == hash(x)
+    assert float(y) == 0.625
+
+
+def test_exact_ratio():
+    assert ratio(6, 4, 'exact') == Dyadic(3, 3)
+    assert ratio(6, 4, 'exact').fraction() == Fraction(6, 16)
+    assert ratio(0, 100, 'exact') == 0
+
+
+def test_log_probability():
+    p = ratio(3, 3, 'log')
+    assert math.isclose(float(p), 3 / 8)
+    assert math.isclose(float(1 - p), 5 / 8)
+    assert math.isclose(float(p * ratio(1, 1, 'log')), 3 / 16)
+    assert math.isclose(float(1 - p * ratio(1, 1, 'log')), 13 / 16)
+    assert math.isclose(float(p + ratio(1, 2, 'log')), 5 / 8)
+    assert ratio(0, 5, 'log') == 0 and ratio(32, 5, 'log') == 1
+
+
+def test_log_probability_does_not_underflow():
+    p = ratio(1, 1, 'log')
+    for _ in range(3000):
+        p = p * ratio(1, 1, 'log')
+    assert float(p) == 0
+    assert math.isclose(p.lp, -3001 * math.log(2))
+    assert (1 - p).lq == p.lp
@@ -0,0 +1,32 @@
+import pytest
+
+from spec_space.measure import Measurer
+from spec_space.sampling import TraceSampler, cross_check, normal_quantile, \
+        wilson
+from tests.reference import FORMULAS, reference_measure
+
+
+def test_interval_contains_the_measure():
+    sampler = TraceSampler(2, samples=20000, confidence=0.999, seed=0)
+    for text in FORMULAS:
+        interval = sampler.estimate(text)
+        assert interval.lower <= reference_measure(text, 2) <= interval.upper
+        assert interval.lower <= interval.estimate <= interval.upper
+
+
+def test_wilson():
+    assert normal_quantile(0.975) == pytest.approx(1.959964, abs=1e-6)
+    interval = wilson(0, 100, 1.96)
+    assert interval.lower == 0 and 0 < interval.upper < 0.05
+    interval = wilson(50, 100, 1.96)
+    assert interval.estimate == 0.5
+    assert interval.lower == pytest.approx(1 - interval.upper)
+
+
+def test_cross_check():
+    exact, estimate, inside = cross_check('a U b', Measurer(3, numeric='exact'),
+            TraceSampler(3, samples=10000, seed=1))
+    assert exact == reference_measure('a U b', 3)
+    assert inside
+    with pytest.raises(ValueError):
+        cross_check('a', Measurer(2), TraceSampler(3))
@@ -0,0 +1,35 @@
+import pytest
+
+from spec_space.counting import CountingError, ModelCounter
+from spec_space.measure import Measurer, parse, simplify, traverse
+from spec_space.truthtable import TruthTableCounter, variable_table
+from spec_space.unroll import Unroller
+from tests.reference import FORMULAS, cases, dag_models, reference_measure
+
+
+def test_variable_table():
+    assert variable_table(0, 4) == 0b1010
+    assert variable_table(1, 4) == 0b1100
+    assert variable_table(2, 8) == 0b11110000
+
+
+@pytest.mark.parametrize('text', FORMULAS)
+def test_counts_match_brute_force(text):
+    unroller = Unroller(2)
+    root = unroller.unroll(traverse(parse(text), simplify))
+    counter = TruthTableCounter(unroller.dag)
+    assert counter.count(root) == dag_models(unroller.dag, root)
+    assert TruthTableCounter(unroller.dag, max_vars=0).count(root) is None \
+            or unroller.dag.is_const(root)
+
+
+class NoCounter(ModelCounter):
+
+    def count(self, dimacs):
+        raise CountingError('expansions must be counted on truth tables')
+
+
+@pytest.mark.parametrize('text,N', cases())
+def test_truth_table_measure(text, N):
+    m = Measurer(N, numeric='exact', bypass_count=False, counter=NoCounter())
+    assert m.measure(text) == reference_measure(text, N)
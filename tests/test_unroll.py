@@ -0,0 +1,16 @@
+from spec_space.measure import parse, simplify, traverse
+from spec_space.unroll import Unroller
+
+
+def edges(text, N):
+    unroller = Unroller(N)
+    root = unroller.unroll(traverse(parse(text), simplify))
+    nodes = unroller.dag.nodes
+    return sum(len(nodes[x][1]) for x in unroller.dag.reachable(root)
+            if nodes[x][0] in ('and', 'or'))
+
+
+def test_nested_temporal_operators_unroll_linearly():
+    for text in ['F G a', 'G F (a | X b)', 'G (a -> F b)', 'a U (b R G c)']:
+        assert edges(text, 200) - edges(text, 100) \
+                == edges(text, 300) - edges(text, 200)
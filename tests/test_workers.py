@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from spec_space.counting import CountingError
+from spec_space import measure
+from spec_space.measure import Measurer
+from spec_space.workers import WorkerPool
+from tests.reference import cases, reference_measure
+
+GOOD = 'p cnf 3 2\n1 -2 0\n2 3 0\n'
+BAD = 'p cnf x\n'
+
+
+def hard_cnf(nvars=64, nclauses=150, seed=0):
+    ''' Random 3-CNF, small enough for the in-process counter but slow to
+        count. '''
+    rng = random.Random(seed)
+    clauses = [[rng.choice((-1, 1)) * v
+            for v in rng.sample(range(1, nvars + 1), 3)]
+            for _ in range(nclauses)]
+    return 'p cnf %d %d\n' % (nvars, nclauses) + ''.join(
+            ' '.join(str(lit) for lit in clause) + ' 0\n' for clause in clauses)
+
+
+def test_failures_do_not_lose_the_batch():
+    with WorkerPool(size=2, batch_size=4) as pool:
+        assert pool.count_many([GOOD, GOOD]) == [4, 4]
+        assert pool.try_count_many([GOOD, BAD, GOOD, BAD, GOOD]) \
+                == [4, None, 4, None, 4]
+        with pytest.raises(CountingError):
+            pool.count_many([GOOD, BAD])
+        assert pool.count(GOOD) == 4
+
+
+def test_measurer_with_helpers():
+    with WorkerPool(size=2) as pool:
+        for N in range(3):
+            m = Measurer(N, numeric='exact', bypass_count=False,
+                    truth_table_limit=0, counter=pool, workers=2,
+                    executor='thread')
+            texts = [text for text, n in cases(max_bits=9) if n == N]
+            assert list(m.measure_batch(texts)) \
+                    == [reference_measure(text, N) for text in texts]
+        assert pool.requests > 0
+
+
+def test_slow_small_cnf_does_not_lose_the_batch():
+    with WorkerPool(size=1, batch_size=4, timeout=1) as pool:
+        assert pool.try_count_many([GOOD, hard_cnf(), GOOD]) == [4, None, 4]
+
+
+def test_main_stops_the_helpers(monkeypatch, capsys):
+    pools = []
+
+    class RecordedPool(WorkerPool):
+        def __init__(self, *args, **kwargs):
+            WorkerPool.__init__(self, *args, **kwargs)
+            pools.append(self)
+
+    monkeypatch.setattr(measure, 'WorkerPool', RecordedPool)
+    measure.main(['measure.py', '-d', '-w', '1', '2', 'a U X b'])
+    assert float(capsys.readouterr().out) \
+            == float(reference_measure('a U X b', 2))
+    assert len(pools) == 1 and pools[0].helpers == []